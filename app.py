@@ -1,17 +1,36 @@
+import time
+STARTUP_T0 = time.perf_counter()  # 进程启动计时起点, 用于启动时间线
+import os
+# 不在标准输出打印pygame欢迎信息, 以免污染导出到管道的帧数据
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
 import pygame
 import pygame.freetype
-import time
 import locale
-import psutil
-import requests
-from lunarcalendar import Converter, Solar
-import os
 import math
 import threading
+import sys
+import argparse
+import socket
+import json
+import hashlib
+import struct
+import datetime
+import heapq
+import itertools
 import queue
-
-# 设置中国时间和语言环境
-locale.setlocale(locale.LC_TIME, 'zh_CN.utf8')
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from array import array
+from functools import partial
+from urllib.parse import urlsplit
+from dataclasses import dataclass, fields, replace
+
+# 设置中国时间和语言环境, 系统未安装中文语言环境时(如CI)沿用默认设置
+try:
+    locale.setlocale(locale.LC_TIME, 'zh_CN.utf8')
+except locale.Error:
+    pass
 
 # 常量定义
 BACKGROUND_COLOR = (0, 0, 0)  # 背景颜色
@@ -20,12 +39,50 @@ FRAME_COLOR = (50, 50, 50)  # 框架颜色
 FRAME_PADDING = 10  # 框架填充
 DIGIT_WIDTH, DIGIT_HEIGHT = 150, 200  # 数字宽度和高度
 MARGIN = 20  # 间距
-IP_INTERFACE = 'wlan0'  # 网络接口
+NETWORK_INTERFACES = ()  # 统计网速和显示IP的网卡, 为空时使用所有非回环、非虚拟网卡
+VIRTUAL_INTERFACE_PREFIXES = ('lo', 'docker', 'veth', 'br-', 'virbr', 'tun', 'tap', 'wg')  # 自动选择网卡时排除的名称前缀, 避免重复统计流量
 HITOKOTO_API = 'https://v1.hitokoto.cn/'  # 一言API
 WEATHER_API = 'https://api.vvhan.com/api/weather'  # 天气API
 IMAGE_PATH = 'tkr.jpg'  # 图片路径
 GOLD_PRICE_API = 'https://api.jinjia.com.cn/index.php?m=app&mi=0&cache=1'  # 金价API
 GOLD_PRICE_STORE_API = 'https://api.jinjia.com.cn/index.php?m=app&a=brand&mi=0&cache=1'
+FLIP_ANIMATION = True  # 是否启用翻页动画
+FLIP_FPS = 60  # 翻页动画期间的帧率
+FLIP_DURATION = 0.4  # 翻页动画时长(秒)
+FLIP_STEPS = 12  # 每半页预缩放的帧数
+HTTP_TIMEOUT = (3, 10)  # HTTP连接/读取超时(秒)
+HTTP_POOL_SIZE = 4  # 每个主机保持的长连接数
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'flip_clock')  # 本地缓存目录
+OFFLINE_STORE_PATH = os.path.join(CACHE_DIR, 'store.sqlite3')  # 保存各数据源最近有效值和一言池的数据库
+RETRY_BACKOFF = 2  # 数据源失败后首次重试的等待(秒), 之后每次失败翻倍, 最长不超过正常刷新间隔
+HITOKOTO_BATCH_SIZE = 20  # 每批预取的一言条数
+HITOKOTO_POOL_LOW = 10  # 未展示过的一言少于该数量时预取下一批
+HITOKOTO_POOL_MAX = 500  # 一言池最多保留的条数
+TELEMETRY_SMOOTHING = 0.0  # 遥测数据的EWMA平滑系数(0~1, 越大越平滑, 0表示不平滑)
+DISK_PATHS = ('/',)  # 统计使用率的磁盘挂载点, 可以填多个, 仪表显示其中使用率最高的
+THERMAL_ROOT = '/sys/class/thermal'  # 热区目录, 仪表显示所有热区中的最高温度
+LUNAR_TABLE_DIR = os.path.join(CACHE_DIR, 'lunar')  # 农历年表目录
+PRECOMPUTE_LUNAR_TABLE = True  # 是否预先计算整年的农历表并保存到磁盘
+DATE_POLL_INTERVAL = 60  # 检查日期变化的间隔(秒)
+SERVER_PORT = 8765  # 服务端模式的默认端口
+SERVER_SEND_TIMEOUT = 2  # 向客户端发送数据的超时(秒), 超时的客户端会被断开
+SERVER_CLIENT_BACKLOG = 64  # 每个客户端最多积压的待发送消息数, 超出说明客户端跟不上, 直接断开
+HEADLESS_SIZE = (1920, 1080)  # 无头模式默认分辨率
+FULL_UPDATE_RATIO = 0.5  # 脏区面积超过屏幕面积的该比例时改为整屏刷新
+TEXT_LAYOUT_CACHE_SIZE = 256  # 缓存的排版结果条数
+GEOMETRY_CACHE_SIZE = 2  # 布局、数字图集和翻页帧按尺寸缓存的份数, 保留当前和上一个尺寸, 来回切换时直接复用
+GAUGE_ANGLE_STEP = 3.6  # 圆环弧度的量化精度(度), 变化小于该值的抖动不会触发重绘
+HISTORY_SECONDS = 4 * 3600  # 遥测历史保留的每秒样本时长(秒)
+HISTORY_TIERS = ((60, 24 * 60), (600, 7 * 24 * 6))  # 降采样层: (每桶秒数, 保留桶数), 即一天的分钟级和一周的十分钟级min/max/avg
+SPARKLINE_RESOLUTION = 1  # 迷你折线图每列代表的秒数: 1为每秒样本, 也可以取HISTORY_TIERS中的桶长, 显示每桶的最大值
+SPARKLINE_MIN_SCALE = 1.0  # 网速折线图纵轴上限的最小值(Mbps), 避免空闲时把噪声放大
+METRICS_WINDOW = 512  # 每项性能指标保留的最近样本数
+METRICS_DUMP_INTERVAL = 10  # 性能指标写入文件的间隔(秒)
+METRICS_BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)  # 耗时直方图的分桶上界(毫秒)
+PRERASTERIZED_CHARS = '0123456789:%.↑↓°C Mbps'  # 启动时预先光栅化的数字和符号
+RENDER_CACHE_MAX_BYTES = 16 * 1024 * 1024  # 文本渲染缓存的内存上限(字节)
+LAYOUT_BASE_SIZE = (1920, 1080)  # 布局基准分辨率, 上面的像素尺寸都以此为准, 其它分辨率按比例缩放
+LAYOUT_MIN_FONT_SIZE = 8  # 缩放后的最小字号
 
 # 初始化Pygame
 pygame.init()
@@ -34,100 +91,988 @@ FONT_PATH = 'SimHei.ttf'  # 字体路径
 TIMES_NEW_ROMAN_PATH = 'times.ttf'  # Times New Roman字体路径
 
 
-class FlipClock:
+class StartupTimeline:
+    # 启动时间线: 记录各启动阶段距进程启动的毫秒数, 用于观察首帧时间
     def __init__(self):
-        # 初始化Pygame显示窗口
-        self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        self.marks = []
+        self.verbose = False
+
+    def enable(self):
+        # 打印已记录的阶段, 之后的阶段实时打印到标准错误
+        self.verbose = True
+        for name, elapsed in self.marks:
+            self.report(name, elapsed)
+
+    def mark(self, name):
+        elapsed = (time.perf_counter() - STARTUP_T0) * 1000
+        self.marks.append((name, elapsed))
+        if self.verbose:
+            self.report(name, elapsed)
+
+    @staticmethod
+    def report(name, elapsed):
+        print(f"[startup] {elapsed:8.1f} ms  {name}", file=sys.stderr)
+
+
+startup = StartupTimeline()
+startup.mark('imports')
+
+
+class RollingMetric:
+    # 单项耗时指标: 最近METRICS_WINDOW个样本(毫秒)保存在固定大小的环形缓冲区里
+    __slots__ = ('samples', 'index', 'filled', 'count', 'total')
+
+    def __init__(self, size):
+        self.samples = array('d', bytes(8 * size))
+        self.index = 0
+        self.filled = 0
+        self.count = 0  # 累计样本数
+        self.total = 0.0  # 累计耗时
+
+    def add(self, value):
+        self.samples[self.index] = value
+        self.index = (self.index + 1) % len(self.samples)
+        self.filled = min(self.filled + 1, len(self.samples))
+        self.count += 1
+        self.total += value
+
+    def summary(self):
+        # 窗口内样本的分位数和直方图
+        values = sorted(self.samples[:self.filled])
+        if not values:
+            return None
+        quantile = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+        buckets, start = [], 0
+        for bound in METRICS_BUCKETS:
+            end = start
+            while end < len(values) and values[end] <= bound:
+                end += 1
+            buckets.append((bound, end))
+            start = end
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'window': len(values),
+            'mean': sum(values) / len(values),
+            'p50': quantile(0.5),
+            'p95': quantile(0.95),
+            'p99': quantile(0.99),
+            'max': values[-1],
+            'buckets': buckets + [('+Inf', len(values))]  # 累计计数
+        }
+
+
+class Metrics:
+    # 性能指标: 记录各部件更新、采集任务和HTTP请求的耗时, 可输出为JSON或Prometheus文本格式
+    def __init__(self, window=METRICS_WINDOW):
+        self.window = window
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, ms):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = RollingMetric(self.window)
+            metric.add(ms)
+
+    def timer(self, name):
+        return MetricTimer(self, name)
+
+    def summaries(self):
+        with self.lock:
+            items = list(self.metrics.items())
+            return {name: metric.summary() for name, metric in sorted(items)}
+
+    def to_json(self):
+        return json.dumps({'timestamp': time.time(), 'metrics': self.summaries()}, ensure_ascii=False, indent=2)
+
+    def to_prometheus(self):
+        # 按Prometheus惯例以秒为单位输出直方图; 分桶、_sum和_count都取最近的滚动窗口, 保证+Inf桶与_count一致
+        lines = ['# TYPE flip_clock_duration_seconds histogram']
+        for name, summary in self.summaries().items():
+            if summary is None:
+                continue
+            for bound, count in summary['buckets']:
+                le = bound if bound == '+Inf' else f'{bound / 1000:g}'
+                lines.append(f'flip_clock_duration_seconds_bucket{{name="{name}",le="{le}"}} {count}')
+            lines.append(f'flip_clock_duration_seconds_sum{{name="{name}"}} {summary["mean"] * summary["window"] / 1000:.9f}')
+            lines.append(f'flip_clock_duration_seconds_count{{name="{name}"}} {summary["window"]}')
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path, fmt='json'):
+        # 先写临时文件再替换, 采集方不会读到写了一半的文件
+        text = self.to_prometheus() if fmt == 'prometheus' else self.to_json()
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(path + '.tmp', path)
+
+    def dump_forever(self, path, fmt='json', interval=None):
+        while True:
+            time.sleep(interval or METRICS_DUMP_INTERVAL)
+            try:
+                self.dump(path, fmt)
+            except OSError as e:
+                print(f"性能指标写入失败: {e}", file=sys.stderr)
+
+
+class MetricTimer:
+    # 计时上下文: with metrics.timer(name): ...
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+metrics = Metrics()
+
+
+class FontView:
+    # 共享字体文件上的某个字号视图, 接口与pygame.freetype.Font的常用方法一致
+    def __init__(self, face, size):
+        self.face = face
+        self.path = face.path
+        self.size = size
+        self.style = face.style
+
+    def render(self, text, fgcolor):
+        return self.face.render(text, fgcolor, size=self.size)
+
+    def get_rect(self, text):
+        return self.face.get_rect(text, size=self.size)
+
+    def get_metrics(self, text):
+        return self.face.get_metrics(text, size=self.size)
+
+    def get_sized_height(self):
+        return self.face.get_sized_height(self.size)
+
+
+class FontManager:
+    # 字体管理: 每个字体文件只打开一次, 各角色按字号取共享字体上的视图
+    # 角色 -> (字体文件, 字号); 字体文件在第一次使用时才打开
+    # base_specs是基准分辨率下的字号, specs是按当前布局缩放后的字号
+    def __init__(self, specs):
+        self.base_specs = specs
+        self.specs = specs
+        self.faces = {}
+        self.views = {}
+
+    def scale_to(self, layout):
+        # 切换到布局计算好的字号; 字体文件不重新打开, 之前用过的字号视图也保留
+        self.specs = layout.font_specs(self.base_specs, self.face)
+
+    def face(self, path):
+        face = self.faces.get(path)
+        if face is None:
+            face = self.faces[path] = pygame.freetype.Font(path)
+        return face
+
+    def __getitem__(self, role):
+        path, size = self.specs[role]
+        view = self.views.get((path, size))
+        if view is None:
+            view = self.views[(path, size)] = FontView(self.face(path), size)
+        return view
+
+    def pending(self):
+        # 尚未打开的字体文件
+        return [path for path in dict.fromkeys(path for path, _ in self.specs.values()) if path not in self.faces]
+
+    def prerasterize(self, roles, chars):
+        # 预先光栅化固定字符集, 让FreeType的字形缓存在首次渲染前就绪
+        for role in roles:
+            self[role].render(chars, (255, 255, 255))
+
+
+class RenderCache:
+    # 文本渲染缓存: 按 (字体, 字号, 样式, 文本, 颜色) 索引, 按表面字节数做LRU淘汰
+    def __init__(self, max_bytes=RENDER_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(font, text, color):
+        return (font.path, font.size, font.style, text, tuple(color))
+
+    @staticmethod
+    def surface_bytes(surface):
+        return surface.get_pitch() * surface.get_height()
+
+    def get(self, font, text, color):
+        key = self.make_key(font, text, color)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            surface, rect, _ = entry
+            # 返回矩形的副本, 避免调用方修改位置时污染缓存
+            return surface, rect.copy()
+
+        self.misses += 1
+        surface, rect = font.render(text, color)
+        size = self.surface_bytes(surface)
+        if size <= self.max_bytes:
+            self.entries[key] = (surface, rect.copy(), size)
+            self.total_bytes += size
+            self.evict()
+        return surface, rect
+
+    def evict(self):
+        # 超出内存上限时淘汰最久未使用的条目
+        while self.total_bytes > self.max_bytes and self.entries:
+            _, (_, _, size) = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            'entries': len(self.entries),
+            'bytes': self.total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+
+class DamageTracker:
+    # 脏矩形管理: 记录各部件本帧的精确绘制范围, 合并重叠或相邻的矩形, 总面积过大时改为整屏刷新
+    def __init__(self, screen_rect, full_ratio=FULL_UPDATE_RATIO):
+        self.screen_rect = screen_rect
+        self.full_ratio = full_ratio
+        self.widget_rects = {}  # 本帧各部件的脏矩形, 便于调试和统计
+        self.drawn_widgets = set()  # 画过内容的部件
+        self.full_update = True  # 下一帧是否强制整屏刷新, 第一帧整屏刷新
+        self.last_full = False  # 上一次collect的结果是否为整屏刷新
+
+    def add(self, name, rects):
+        self.widget_rects.setdefault(name, []).extend(rects)
+        self.drawn_widgets.add(name)
+
+    def invalidate_all(self):
+        self.full_update = True
+
+    @staticmethod
+    def merge(rects):
+        # 反复合并相互重叠或紧邻的矩形, 直到没有可合并的为止
+        merged = []
+        for rect in rects:
+            rect = rect.copy()
+            changed = True
+            while changed:
+                changed = False
+                for other in merged:
+                    if rect.inflate(2, 2).colliderect(other):
+                        merged.remove(other)
+                        rect.union_ip(other)
+                        changed = True
+                        break
+            merged.append(rect)
+        return merged
+
+    def collect(self):
+        # 返回本帧需要刷新的矩形并清空记录; 需要整屏刷新时返回整屏矩形并置last_full
+        rects = [rect.clip(self.screen_rect) for rects in self.widget_rects.values() for rect in rects]
+        rects = self.merge([rect for rect in rects if rect.width and rect.height])
+        self.widget_rects = {}
+        area = sum(rect.width * rect.height for rect in rects)
+        self.last_full = self.full_update or area > self.full_ratio * self.screen_rect.width * self.screen_rect.height
+        self.full_update = False
+        if self.last_full:
+            return [self.screen_rect.copy()]
+        return rects
+
+
+class TextLayout:
+    # 文本排版: 缓存每个字体的字形前进宽度, 一次遍历累加宽度完成换行, 中日韩文字可逐字断行
+    # 排版结果按 (字体, 文本, 最大宽度) 做LRU缓存
+    NO_LINE_START = set('，。、；：！？）》」』】”’,.;:!?)]}%')  # 不放在行首的标点
+
+    def __init__(self, max_entries=TEXT_LAYOUT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.advances = {}  # {字体键: {字符: 前进宽度}}
+        self.layouts = OrderedDict()
+
+    @staticmethod
+    def font_key(font):
+        return (font.path, font.size, font.style)
+
+    @staticmethod
+    def is_cjk(char):
+        code = ord(char)
+        return (0x2E80 <= code <= 0x9FFF or 0xAC00 <= code <= 0xD7AF
+                or 0xF900 <= code <= 0xFAFF or 0xFF00 <= code <= 0xFFEF)
+
+    def advance_table(self, font, text):
+        # 返回字体的前进宽度表, 只为尚未测量过的字符调用一次get_metrics
+        table = self.advances.setdefault(self.font_key(font), {})
+        missing = ''.join(set(text) - table.keys() - {'\n'})
+        if missing:
+            for char, metrics in zip(missing, font.get_metrics(missing)):
+                if metrics:
+                    table[char] = metrics[4]
+                else:
+                    # 缺字时get_metrics返回None, 用两个与一个替代方框的宽度差作为前进宽度
+                    table[char] = font.get_rect(char * 2).width - font.get_rect(char).width
+        return table
+
+    def tokens(self, text):
+        # 切分为断行单位: 连续的非中日韩字符组成一个词, 每个中日韩字符单独成词, 空格单独成词
+        token = ''
+        for char in text:
+            if char == ' ' or self.is_cjk(char):
+                if token:
+                    yield token
+                    token = ''
+                yield char
+            else:
+                token += char
+        if token:
+            yield token
+
+    def wrap(self, font, text, max_width=None):
+        # 返回排版后的行元组; max_width为None时只按换行符分行
+        key = (self.font_key(font), text, max_width)
+        lines = self.layouts.get(key)
+        if lines is not None:
+            self.layouts.move_to_end(key)
+            return lines
+
+        if max_width is None:
+            lines = tuple(text.split('\n'))
+        else:
+            table = self.advance_table(font, text)
+            lines = []
+            for paragraph in text.split('\n'):
+                lines.extend(self.wrap_paragraph(paragraph, table, max_width))
+            lines = tuple(lines)
+
+        self.layouts[key] = lines
+        if len(self.layouts) > self.max_entries:
+            self.layouts.popitem(last=False)
+        return lines
+
+    def wrap_paragraph(self, paragraph, table, max_width):
+        lines = []
+        line, width = [], 0
+        for token in self.tokens(paragraph):
+            token_width = sum(table[char] for char in token)
+            if width + token_width > max_width and line and token[0] not in self.NO_LINE_START:
+                if token == ' ':
+                    # 行尾的空格直接丢弃
+                    lines.append(''.join(line).rstrip())
+                    line, width = [], 0
+                    continue
+                lines.append(''.join(line).rstrip())
+                line, width = [], 0
+            if token_width > max_width and len(token) > 1:
+                # 单个词比整行还宽时逐字符断开
+                for char in token:
+                    if width + table[char] > max_width and line:
+                        lines.append(''.join(line))
+                        line, width = [], 0
+                    line.append(char)
+                    width += table[char]
+                continue
+            line.append(token)
+            width += token_width
+        lines.append(''.join(line).rstrip())
+        return lines
+
+
+class Layout:
+    # 分辨率无关的布局: 以LAYOUT_BASE_SIZE为基准等比缩放, 每种分辨率只计算一次所有部件的位置和字号, 绘制时直接查表
+    cache = OrderedDict()  # {分辨率: 布局}, 最多保留GEOMETRY_CACHE_SIZE份
+    # 需要放进固定区域的字体角色: 角色 -> (测量用文本, 区域名)
+    FITTED_FONTS = {
+        'digit': ('0123456789', 'digit_box'),
+        'time': ('0123456789', 'digit_box'),
+        'usage': ('100°C', 'gauge_box')
+    }
+
+    @classmethod
+    def for_size(cls, size):
+        size = tuple(size)
+        layout = cls.cache.get(size)
+        if layout is None:
+            layout = cls.cache[size] = cls(size)
+            if len(cls.cache) > GEOMETRY_CACHE_SIZE:
+                cls.cache.popitem(last=False)
+        else:
+            cls.cache.move_to_end(size)
+        return layout
+
+    def __init__(self, size):
+        self.width, self.height = width, height = size
+        # 取宽高两个方向缩放比例的较小值, 8个格子的数字条和上下部件都能放下
+        self.scale = scale = min(width / LAYOUT_BASE_SIZE[0], height / LAYOUT_BASE_SIZE[1])
+
+        # 翻页数字格子
+        digit_width = max(1, round(DIGIT_WIDTH * scale))
+        digit_height = max(1, round(DIGIT_HEIGHT * scale))
+        margin = round(MARGIN * scale)
+        self.frame_padding = padding = round(FRAME_PADDING * scale)
+        self.border_radius = max(1, round(10 * scale))
+        x_start = (width - 8 * digit_width - 7 * margin) // 2
+        y_start = (height - digit_height) // 2 + round(50 * scale)
+        self.cell_size = (digit_width, digit_height + 2 * padding)
+        self.cell_rects = [pygame.Rect(x_start + i * (digit_width + margin), y_start - padding, *self.cell_size)
+                           for i in range(8)]
+        self.digit_box = (digit_width - 2 * padding, digit_height)
+
+        # 文本部件的锚点
+        self.positions = {
+            'date': (width // 2, height // 4 - round(150 * scale)),
+            'lunar_date': (width // 2, height // 4 - round(100 * scale)),
+            'hitokoto': (width // 2, height // 4),
+            'gold_price': (round(30 * scale), height - round(200 * scale)),
+            'weather': (width - round(250 * scale), round(80 * scale)),
+            'network': (width // 2, height - round(50 * scale)),
+            'metrics_overlay': (10, 10)
+        }
+        self.weather_width = max(1, round(200 * scale))
+
+        # 圆环仪表: 4个一排居中, 位于底部网络信息之上
+        self.gauge_radius = max(4, round(Gauge.RADIUS * scale))
+        self.gauge_thickness = max(1, round(Gauge.THICKNESS * scale))
+        self.gauge_padding = max(1, round(10 * scale))  # 仪表矩形在圆环外的留白
+        self.gauge_label_offset = round(20 * scale)
+        self.gauge_value_offset = round(10 * scale)
+        spacing = round(120 * scale)
+        start_x = (width - 4 * spacing) // 2 + spacing // 2
+        gauge_y = height - round(140 * scale)
+        self.gauge_centers = [(start_x + i * spacing, gauge_y) for i in range(4)]
+        inner = 2 * (self.gauge_radius - self.gauge_thickness)
+        self.gauge_box = (inner, inner // 2)
+
+        # 迷你折线图: 每个仪表矩形的正下方一条(不与仪表重叠, 仪表重绘时不会覆盖); 网速的上行和下行两条叠放在仪表行右侧
+        radius = self.gauge_radius
+        spark_top = radius + self.gauge_padding + round(2 * scale)
+        spark_height = max(2, round(12 * scale))
+        self.gauge_sparklines = [pygame.Rect(x - radius, y + spark_top, 2 * radius, spark_height)
+                                 for x, y in self.gauge_centers]
+        network_x = self.gauge_centers[-1][0] + radius + round(30 * scale)
+        network_width = max(2, round(160 * scale))
+        network_height = max(2, radius - round(2 * scale))
+        self.network_sparklines = [pygame.Rect(network_x, gauge_y - radius, network_width, network_height),
+                                   pygame.Rect(network_x, gauge_y + radius - network_height, network_width, network_height)]
+
+        # 右下角图片
+        self.image_size = (max(1, round(250 * scale)), max(1, round(230 * scale)))
+        self.image_bottomright = (width - round(10 * scale), height - round(10 * scale))
+
+        self.fonts = {}  # {基准字体配置: 缩放后的字体配置}
+
+    def font_specs(self, base_specs, face):
+        # 字号按比例缩放, 需要放进固定区域的角色再逐步缩小到放得下为止; 结果按基准配置缓存
+        key = tuple(sorted(base_specs.items()))
+        specs = self.fonts.get(key)
+        if specs is None:
+            specs = {}
+            for role, (path, size) in base_specs.items():
+                size = max(LAYOUT_MIN_FONT_SIZE, round(size * self.scale))
+                if role in self.FITTED_FONTS:
+                    text, box = self.FITTED_FONTS[role]
+                    size = self.fit_font_size(face(path), text, size, getattr(self, box))
+                specs[role] = (path, size)
+            self.fonts[key] = specs
+        return specs
+
+    @staticmethod
+    def fit_font_size(face, text, size, box):
+        # 最宽的单个字符和整串文本的高度都不超出区域时的最大字号(不超过给定字号)
+        while size > LAYOUT_MIN_FONT_SIZE:
+            width = max(face.get_rect(char, size=size).width for char in text)
+            if width <= box[0] and face.get_rect(text, size=size).height <= box[1]:
+                break
+            size = max(LAYOUT_MIN_FONT_SIZE, int(size * 0.95))
+        return size
+
+
+class Gauge:
+    # 单个圆环仪表: 背景圆环和标签预先绘制在静态图层上, 只有本仪表的显示值变化时才重绘
+    RADIUS = 50  # 基准分辨率下的半径和环宽, 实际尺寸取自布局
+    THICKNESS = 10
+
+    def __init__(self, flip_clock, center, label, color, unit):
+        self.flip_clock = flip_clock
+        self.center = center
+        self.label = label
+        self.color = color
+        self.unit = unit
+        layout = flip_clock.layout
+        self.radius = layout.gauge_radius
+        self.thickness = layout.gauge_thickness
+        self.label_offset = layout.gauge_label_offset
+        self.value_offset = layout.gauge_value_offset
+        self.rect = pygame.Rect(0, 0, 2 * (self.radius + layout.gauge_padding), 2 * (self.radius + layout.gauge_padding))
+        self.rect.center = center
+        self.shown = None
+        self.static_layer = None  # 第一次绘制时才创建, 不拖慢启动
+
+    def build_static_layer(self):
+        # 静态图层: 背景圆环和标签
+        layer = pygame.Surface(self.rect.size)
+        layer.fill(BACKGROUND_COLOR)
+        local_center = (self.rect.width // 2, self.rect.height // 2)
+        pygame.draw.circle(layer, (100, 100, 100), local_center, self.radius, self.thickness)
+        label_surface, label_rect = self.flip_clock.get_rendered_text(self.flip_clock.fonts['label'], self.label, (255, 255, 255))
+        label_rect.midtop = (local_center[0], local_center[1] - self.label_offset)
+        layer.blit(label_surface, label_rect)
+        return layer
+
+    def update(self, value):
+        # 弧度按GAUGE_ANGLE_STEP量化; 量化后的弧度和显示文本都不变时跳过, 返回None
+        steps = round(360 * min(max(value, 0), 100) / 100 / GAUGE_ANGLE_STEP)
+        text = f"{int(value)}{self.unit}"
+        if (steps, text) == self.shown:
+            return None
+        self.shown = (steps, text)
+        self.draw()
+        return self.rect
+
+    def draw(self):
+        # 按当前显示值绘制: 静态图层 + 量化后的弧 + 数值文本
+        if self.shown is None:
+            return
+        steps, text = self.shown
+        if self.static_layer is None:
+            self.static_layer = self.build_static_layer()
+        screen = self.flip_clock.screen
+        screen.blit(self.static_layer, self.rect)
+        if steps:
+            x, y = self.center
+            pygame.draw.arc(screen, self.color,
+                            (x - self.radius, y - self.radius, 2 * self.radius, 2 * self.radius),
+                            0, math.radians(steps * GAUGE_ANGLE_STEP), self.thickness)
+        self.flip_clock.render_text(self.flip_clock.fonts['usage'], text, (self.center[0], self.center[1] + self.value_offset))
+
+
+class RingBuffer:
+    # 固定大小的浮点环形缓冲区(array('f')), count为累计写入的样本数
+    __slots__ = ('data', 'count')
+
+    def __init__(self, size):
+        self.data = array('f', bytes(4 * size))
+        self.count = 0
+
+    def append(self, value):
+        self.data[self.count % len(self.data)] = value
+        self.count += 1
+
+    def latest(self, n):
+        # 最近n个样本, 旧的在前
+        size = len(self.data)
+        n = min(n, self.count, size)
+        end = self.count % size
+        if n <= end:
+            return self.data[end - n:end]
+        return self.data[size - (n - end):] + self.data[:end]
+
+
+class SeriesHistory:
+    # 单个遥测量的历史: 每秒样本的环形缓冲区, 以及按HISTORY_TIERS降采样的min/max/avg环形缓冲区
+    # 内存占用固定, 不随运行时间增长
+    def __init__(self, seconds=HISTORY_SECONDS, tiers=HISTORY_TIERS):
+        self.raw = RingBuffer(seconds)
+        self.tiers = {bucket: {'min': RingBuffer(size), 'max': RingBuffer(size), 'avg': RingBuffer(size)}
+                      for bucket, size in tiers}
+        self.buckets = {bucket: [math.inf, -math.inf, 0.0, 0] for bucket, _ in tiers}  # 正在累积的桶: 最小, 最大, 总和, 样本数
+
+    def append(self, value):
+        self.raw.append(value)
+        for bucket, acc in self.buckets.items():
+            acc[0] = min(acc[0], value)
+            acc[1] = max(acc[1], value)
+            acc[2] += value
+            acc[3] += 1
+            if acc[3] == bucket:
+                tier = self.tiers[bucket]
+                tier['min'].append(acc[0])
+                tier['max'].append(acc[1])
+                tier['avg'].append(acc[2] / acc[3])
+                acc[:] = [math.inf, -math.inf, 0.0, 0]
+
+    def level(self, resolution, stat='max'):
+        # 按分辨率取缓冲区: 1为每秒样本, 其它为对应降采样层的指定统计量
+        if resolution == 1:
+            return self.raw
+        return self.tiers[resolution][stat]
+
+
+class Sparkline:
+    # 迷你折线图: 有新样本时把已有图像左移, 只绘制新的列; 只有纵轴范围变化或需要整幅重绘时才按历史重画全部列
+    def __init__(self, flip_clock, rect, series, color, maximum=None):
+        self.flip_clock = flip_clock
+        self.rect = rect
+        self.series = series
+        self.color = color
+        self.fill_color = tuple(c // 3 for c in color)
+        self.maximum = maximum  # 固定的纵轴上限; None表示按可见范围内的峰值自动缩放
+        self.scale = maximum or SPARKLINE_MIN_SCALE
+        self.surface = pygame.Surface(rect.size)
+        self.surface.fill(BACKGROUND_COLOR)
+        self.drawn_count = None  # 已绘制到的样本数, None表示需要整幅重绘
+
+    def update(self):
+        # 返回需要刷新的矩形, 没有新样本时返回None
+        count = self.series.count
+        if count == self.drawn_count:
+            return None
+        width, height = self.rect.size
+        new = width if self.drawn_count is None else min(count - self.drawn_count, width)
+        full = new >= width
+        if self.maximum is None:
+            # 峰值超出纵轴范围, 或可见范围内的峰值已不到上限的一半时重新缩放
+            peak = max(self.series.latest(width), default=0)
+            if peak > self.scale or (peak < self.scale / 2 and self.scale > SPARKLINE_MIN_SCALE):
+                self.scale = max(peak, SPARKLINE_MIN_SCALE)
+                full = True
+        if full:
+            self.surface.fill(BACKGROUND_COLOR)
+            values = self.series.latest(width)
+            start = width - len(values)
+        else:
+            self.surface.scroll(-new, 0)
+            self.surface.fill(BACKGROUND_COLOR, (width - new, 0, new, height))
+            values = self.series.latest(new)
+            start = width - new
+        for x, value in enumerate(values, start):
+            self.draw_column(x, value)
+        self.drawn_count = count
+        self.flip_clock.screen.blit(self.surface, self.rect)
+        return self.rect
+
+    def draw_column(self, x, value):
+        # 每列是一条从底部到样本值的暗色竖线, 顶端一个亮点
+        bottom = self.rect.height - 1
+        y = bottom - round(min(max(value, 0), self.scale) / self.scale * bottom)
+        pygame.draw.line(self.surface, self.fill_color, (x, bottom), (x, y))
+        self.surface.set_at((x, y), self.color)
+
+
+class FlipClock:
+    def __init__(self, size=None, headless=False, widgets=None, animate=None):
+        # 是否启用翻页动画, 默认按FLIP_ANIMATION
+        self.animate = FLIP_ANIMATION if animate is None else animate
+
+        # 要绘制的部件, 默认为注册表中的全部部件; 每帧调用的部件和只在数据变化时调用的部件分开
+        self.widget_specs = enabled_widgets() if widgets is None else widgets
+        self.data_widget_specs = [widget for widget in self.widget_specs if not widget.every_frame]
+
+        # 初始化Pygame显示窗口; 无头模式下绘制到离屏表面, 不需要显示设备
+        # 指定分辨率的窗口可以调整大小
+        self.headless = headless
+        if headless:
+            self.screen = pygame.Surface(size or HEADLESS_SIZE)
+        elif size:
+            self.screen = pygame.display.set_mode(size, pygame.RESIZABLE)
+        else:
+            self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
         self.width, self.height = self.screen.get_width(), self.screen.get_height()
-        self.x_start = (self.width - 8 * DIGIT_WIDTH - 7 * MARGIN) // 2
-        self.y_start = (self.height - DIGIT_HEIGHT) // 2 + 50
+
+        # 按分辨率计算的布局: 所有部件的位置、尺寸和字号
+        self.layout = Layout.for_size((self.width, self.height))
 
         # 加载字体
         self.fonts = self.load_fonts()
 
-        # 用于缓存渲染的文本
-        self.rendered_text_cache = {}
-        pygame.display.set_caption('Flip Clock')
+        # 用于缓存渲染的文本和排版结果
+        self.rendered_text_cache = RenderCache()
+        self.text_layout = TextLayout()
+
+        # 预渲染翻页数字图集(含背景框), 首帧只依赖它; 图集和翻页帧按格子尺寸和字号缓存, 调整窗口大小后再切回来时直接复用
+        # 每份图集约1.4MB、翻页帧约8MB, 只保留最近GEOMETRY_CACHE_SIZE个尺寸
+        self.atlas_cache = OrderedDict()
+        self.halves_cache = OrderedDict()
+        self.cell_rects = self.layout.cell_rects
+        self.digit_atlas = self.build_digit_atlas()
+        startup.mark('digit atlas')
+
+        # 翻页动画: 预缩放的上下半页(启动后空闲时生成, 生成前数字直接切换), 正在翻动的格子 {格子序号: (旧字符, 新字符, 开始时间, 已绘制帧)}
+        self.flip_halves = {}
+        self.flips = {}
+        self.frame_budget_exceeded = False
+
+        # 性能指标浮层, 按F3切换
+        self.show_metrics = False
+        self.metrics_time = None
 
-        # 隐藏鼠标指针
-        pygame.mouse.set_visible(False)
+        if not headless:
+            pygame.display.set_caption('Flip Clock')
+
+            # 隐藏鼠标指针
+            pygame.mouse.set_visible(False)
 
         # 初始化变量
         self.old_data = self.init_old_data()
 
+        # 系统使用率圆环仪表
+        self.gauges = self.init_gauges()
+
+        # 遥测历史和迷你折线图, 每个显示的整秒记录一个样本
+        self.history = {}
+        self.history_time = None
+        self.sparklines = self.init_sparklines()
+
+        # 各部件的更新函数, 以及已绘制的数据快照版本
+        self.frame_widgets = self.frame_widget_updates()
+        self.widgets = self.widget_updates()
+
         # 记录上次绘制内容的矩形区域
         self.rects = self.init_rects()
+        # 初始快照(版本0)只有占位数据, 数据部件等到第一份数据到达后才绘制
+        self.drawn_version = 0
+        self.drawn_snapshot = None  # 上次绘制的快照, 用于找出变化的字段; None表示所有部件都要更新
+        self.damage = DamageTracker(self.screen.get_rect())
+        self.drawn_frames = 0
+
+        # 清除区域时需要重绘的静态图层 [(表面, 位置)]
+        self.static_layers = []
+        self.image_source = None
+
+        # 首帧之后在空闲时逐个加载的资源: 其余字体、翻页动画帧和静态图片
+        self.pending_assets = [lambda path=path: self.fonts.face(path) for path in self.fonts.pending()]
+        self.pending_assets.append(lambda: self.fonts.prerasterize(['digit', 'usage', 'ip', 'label'], PRERASTERIZED_CHARS))
+        if self.animate:
+            self.pending_assets.append(self.load_flip_halves)
+        self.pending_assets.append(self.load_image)
+
+    def load_next_asset(self):
+        # 加载一项延迟资源, 返回是否还有未加载的资源
+        if self.pending_assets:
+            self.pending_assets.pop(0)()
+            if not self.pending_assets:
+                startup.mark('assets loaded')
+        return bool(self.pending_assets)
+
+    def load_all_assets(self):
+        while self.load_next_asset():
+            pass
+
+    def load_flip_halves(self):
+        self.flip_halves = self.remember(self.halves_cache, self.tile_key(), self.build_flip_halves())
 
-        # 加载静态图片
-        self.image = pygame.image.load(IMAGE_PATH)
-        self.image = pygame.transform.scale(self.image, (250, 230))
+    @staticmethod
+    def remember(cache, key, value):
+        # 按尺寸缓存图块, 超出GEOMETRY_CACHE_SIZE时淘汰最久未用的
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > GEOMETRY_CACHE_SIZE:
+            cache.popitem(last=False)
+        return value
+
+    def load_image(self):
+        # 加载静态图片, 按布局缩放后绘制到右下角
+        self.image_source = pygame.image.load(IMAGE_PATH)
+        self.place_image()
+
+    def place_image(self):
+        self.image = pygame.transform.scale(self.image_source, self.layout.image_size)
         self.image_rect = self.image.get_rect()
         self.draw_image()
+        self.static_layers.append((self.image, self.image_rect))
+        self.damage.add('image', [self.image_rect])
 
     def load_fonts(self):
-        # 加载所有需要的字体
-        return {
-            'date': pygame.freetype.Font(FONT_PATH, 50),
-            'time': pygame.freetype.Font(TIMES_NEW_ROMAN_PATH, 180),
-            'lunar': pygame.freetype.Font(FONT_PATH, 30),
-            'digit': pygame.freetype.Font(TIMES_NEW_ROMAN_PATH, 180),
-            'ip': pygame.freetype.Font(TIMES_NEW_ROMAN_PATH, 30),
-            'hitokoto': pygame.freetype.Font(FONT_PATH, 30),
-            'usage': pygame.freetype.Font(TIMES_NEW_ROMAN_PATH, 30),
-            'label': pygame.freetype.Font(TIMES_NEW_ROMAN_PATH, 20),
-            'gold': pygame.freetype.Font(FONT_PATH, 30),
-            'weather': pygame.freetype.Font(FONT_PATH, 30)
-        }
+        # 登记所有需要的字体角色(基准分辨率下的字号), 同一字体文件只打开一次, 'time'和'digit'共用同一个视图
+        fonts = FontManager({
+            'date': (FONT_PATH, 50),
+            'time': (TIMES_NEW_ROMAN_PATH, 180),
+            'lunar': (FONT_PATH, 30),
+            'digit': (TIMES_NEW_ROMAN_PATH, 180),
+            'ip': (TIMES_NEW_ROMAN_PATH, 30),
+            'hitokoto': (FONT_PATH, 30),
+            'usage': (TIMES_NEW_ROMAN_PATH, 30),
+            'label': (TIMES_NEW_ROMAN_PATH, 20),
+            'gold': (FONT_PATH, 30),
+            'weather': (FONT_PATH, 30)
+        })
+        fonts.scale_to(self.layout)
+        return fonts
+
+    def tile_key(self):
+        # 数字图块由格子尺寸、圆角和数字字号决定
+        return (self.layout.cell_size, self.layout.border_radius, self.fonts.specs['digit'])
+
+    def build_digit_atlas(self):
+        # 为每个数字和冒号预先绘制整格图块, 数字带圆角背景框, 所有格子共用同一套图块
+        key = self.tile_key()
+        if key in self.atlas_cache:
+            self.atlas_cache.move_to_end(key)
+            return self.atlas_cache[key]
+        atlas = self.remember(self.atlas_cache, key, {})
+        for char in '0123456789:':
+            tile = pygame.Surface(self.layout.cell_size)
+            tile.fill(BACKGROUND_COLOR)
+            if char.isdigit():
+                pygame.draw.rect(tile, FRAME_COLOR, tile.get_rect(), border_radius=self.layout.border_radius)
+            digit_surface, digit_rect = self.get_rendered_text(self.fonts['digit'], char, DIGIT_COLOR)
+            digit_rect.center = tile.get_rect().center
+            tile.blit(digit_surface, digit_rect)
+            atlas[char] = tile
+        return atlas
+
+    def build_flip_halves(self):
+        # 预先缩放每个数字的上下半页, 动画期间只做blit, 不再分配新的表面
+        # 第i帧为半页高度的(i+1)/FLIP_STEPS, 最后一帧是完整的半页
+        halves = {}
+        for char, tile in self.digit_atlas.items():
+            if not char.isdigit():
+                continue
+            width, height = tile.get_size()
+            half = height // 2
+            top = tile.subsurface((0, 0, width, half))
+            bottom = tile.subsurface((0, half, width, height - half))
+            halves[char] = {
+                'top': [pygame.transform.smoothscale(top, (width, max(1, half * step // FLIP_STEPS)))
+                        for step in range(1, FLIP_STEPS + 1)],
+                'bottom': [pygame.transform.smoothscale(bottom, (width, max(1, (height - half) * step // FLIP_STEPS)))
+                           for step in range(1, FLIP_STEPS + 1)]
+            }
+        return halves
 
     def init_old_data(self):
-        # 初始化旧数据变量
-        return {
-            'time': "",
-            'date': "",
-            'lunar_date': "",
-            'ip': "",
-            'hitokoto': "",
-            'cpu_usage': 0,
-            'memory_usage': 0,
-            'disk_usage': 0,
-            'upload_speed': 0,
-            'download_speed': 0,
-            'cpu_temp': 0,
-            'gold_price': "",
-            'weather': ""
-        }
+        # 初始化旧数据变量, 与初始快照一致, 数据到达前不绘制占位内容
+        initial = DataSnapshot()
+        return {field.name: getattr(initial, field.name) for field in fields(DataSnapshot)}
 
     def init_rects(self):
-        # 初始化矩形区域
-        return {
-            "date": None,
-            "lunar_date": None,
-            "hitokoto": None,
-            "time": None,
-            "usage": None,
-            "network": None,
-            "gold_price": None,
-            "weather": None
-        }
+        # 初始化矩形区域: 每帧部件和已启用的数据部件
+        return dict.fromkeys([name for name, _ in self.frame_widgets] + [widget.name for widget in self.data_widget_specs])
+
+    def frame_widget_updates(self):
+        # 每帧都要更新的部件: 时钟数字和翻页动画
+        return [
+            ('time', self.update_flip_time),
+            ('flips', lambda data, dirty_rects: self.update_flips(dirty_rects)),
+            ('metrics_overlay', self.update_metrics_overlay)
+        ] + [(widget.name, partial(widget.update, self, widget)) for widget in self.widget_specs if widget.every_frame]
+
+    def widget_updates(self):
+        # 已启用的数据部件, 按注册顺序排列: [(名称, 函数(data, dirty_rects))]
+        return [(widget.name, partial(widget.update, self, widget)) for widget in self.data_widget_specs]
+
+    def changed_widgets(self, data):
+        # 依赖字段相对上次绘制有变化的数据部件
+        if self.drawn_snapshot is None:
+            return self.widgets
+        return [entry for entry, widget in zip(self.widgets, self.data_widget_specs)
+                if any(data[key] != self.drawn_snapshot[key] for key in widget.keys)]
 
     def draw_flip_clock(self, data):
-        dirty_rects = []
-        self.update_text(data, 'date', dirty_rects, self.fonts['date'], (self.width // 2, self.height // 4 - 150))
-        self.update_text(data, 'lunar_date', dirty_rects, self.fonts['lunar'], (self.width // 2, self.height // 4 - 100))
-        self.update_text(data, 'hitokoto', dirty_rects, self.fonts['hitokoto'], (self.width // 2, self.height // 4))
-        self.update_flip_time(data, dirty_rects)
-        self.update_usage_circles(data, dirty_rects)
-        self.update_network_info(data, dirty_rects)
-        self.update_text(data, 'gold_price', dirty_rects, self.fonts['gold'], (30, self.height - 200), alignment='left')
-        self.update_text(data, 'weather', dirty_rects, self.fonts['weather'], (self.width-250, 80), wrapped=True, max_width=200)
-        return dirty_rects
+        # 数据快照版本未变时跳过所有数据部件, 变化时只更新依赖字段有变化的部件; 返回合并后的脏矩形
+        widgets = self.frame_widgets
+        if data.version != self.drawn_version:
+            widgets = widgets + self.changed_widgets(data)
+            self.drawn_version = data.version
+            self.drawn_snapshot = data
+        for name, update in widgets:
+            dirty_rects = []
+            start = time.perf_counter()
+            update(data, dirty_rects)
+            metrics.record(f"widget.{name}", (time.perf_counter() - start) * 1000)
+            if dirty_rects:
+                if name not in self.damage.drawn_widgets:
+                    startup.mark(f"first draw: {name}")
+                self.damage.add(name, dirty_rects)
+        return self.damage.collect()
+
+    def redraw_all(self):
+        # 整屏重绘: 清空屏幕, 下一帧所有部件按当前数据重新绘制
+        self.screen.fill(BACKGROUND_COLOR)
+        for layer, layer_rect in self.static_layers:
+            self.screen.blit(layer, layer_rect)
+        self.old_data = self.init_old_data()
+        self.rects = self.init_rects()
+        for gauge in self.gauges.values():
+            gauge.shown = None
+        for sparkline in self.sparklines:
+            sparkline.drawn_count = None
+        self.flips = {}
+        self.metrics_time = None
+        self.drawn_version = -1
+        self.drawn_snapshot = None
+        self.damage.invalidate_all()
+
+    def resize(self, size):
+        # 窗口大小变化: 切换到新分辨率的布局, 字号、图集、仪表和图片按新布局重建(已缓存的直接复用), 然后整屏重绘
+        if tuple(size) == (self.width, self.height):
+            return
+        if self.headless:
+            self.screen = pygame.Surface(size)
+        else:
+            self.screen = pygame.display.set_mode(size, pygame.RESIZABLE)
+        self.width, self.height = self.screen.get_size()
+        self.layout = Layout.for_size((self.width, self.height))
+        self.fonts.scale_to(self.layout)
+        self.cell_rects = self.layout.cell_rects
+        self.digit_atlas = self.build_digit_atlas()
+        self.flip_halves = self.halves_cache.get(self.tile_key(), {})
+        if self.flip_halves:
+            self.halves_cache.move_to_end(self.tile_key())
+        if self.animate and not self.flip_halves and self.load_flip_halves not in self.pending_assets:
+            # 新尺寸的翻页帧在空闲时生成, 生成前数字直接切换
+            self.pending_assets.append(self.load_flip_halves)
+        self.gauges = self.init_gauges()
+        self.sparklines = self.init_sparklines()
+        self.damage.screen_rect = self.screen.get_rect()
+        self.static_layers = []
+        self.redraw_all()
+        if self.image_source is not None:
+            self.place_image()
+
+    def toggle_metrics_overlay(self):
+        self.show_metrics = not self.show_metrics
+        if not self.show_metrics:
+            # 浮层盖住了其它部件, 关闭时整屏重绘
+            self.redraw_all()
+
+    def update_metrics_overlay(self, data, dirty_rects):
+        # 性能指标浮层: 每秒刷新一次, 列出p95耗时最高的若干项
+        if not self.show_metrics or data['time'] == self.metrics_time:
+            return
+        self.metrics_time = data['time']
+        summaries = [(name, summary) for name, summary in metrics.summaries().items() if summary]
+        summaries.sort(key=lambda item: item[1]['p95'], reverse=True)
+        lines = [f"{name}  p50 {summary['p50']:.2f}  p95 {summary['p95']:.2f}  max {summary['max']:.2f} ms"
+                 for name, summary in summaries[:12]] or ["no metrics yet"]
+        if self.rects['metrics_overlay']:
+            self.clear_rect(self.rects['metrics_overlay'])
+            dirty_rects.append(self.rects['metrics_overlay'])
+        rect = self.render_text(self.fonts['label'], '\n'.join(lines), self.layout.positions['metrics_overlay'], alignment='left')
+        self.rects['metrics_overlay'] = rect
+        dirty_rects.append(rect)
+
+    def present(self, dirty_rects):
+        # 把本帧的变化刷新到屏幕
+        if self.damage.last_full:
+            pygame.display.flip()
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
 
 
     def update_text(self, data, key, dirty_rects, font, position, wrapped=False, max_width=None, alignment='center'):
         # 更新文本信息
         if data[key] != self.old_data[key]:
             if self.rects[key]:
+                # 旧内容所在区域也要刷新, 否则新文本较短时会留下残影
                 self.clear_rect(self.rects[key])
+                dirty_rects.append(self.rects[key])
             if wrapped:
                 self.rects[key] = self.render_wrapped_text(font, data[key], position, max_width, alignment)
             else:
@@ -138,40 +1083,64 @@ class FlipClock:
     def update_flip_time(self, data, dirty_rects):
         # 更新翻页时钟
         if data['time'] and (data['time'] != self.old_data['time']):
-            if self.rects['time']:
-                self.clear_rect(self.rects['time'])
-            self.rects['time'] = self.render_flip_numbers(data['time'])
-            dirty_rects.append(self.rects['time'])
+            changed_rects = self.render_flip_numbers(data['time'], self.old_data['time'])
+            self.rects['time'] = self.cell_rects[0].unionall(self.cell_rects[1:])
+            dirty_rects.extend(changed_rects)
             self.old_data['time'] = data['time']
 
     def update_usage_circles(self, data, dirty_rects):
-        # 更新系统使用率的圆环
-        if any(data[key] != self.old_data[key] for key in ['cpu_usage', 'memory_usage', 'disk_usage', 'cpu_temp']):
-            if self.rects['usage']:
-                self.clear_rect(self.rects['usage'])
-            self.rects['usage'] = self.draw_usage_circles(data['cpu_usage'], data['memory_usage'], data['disk_usage'], data['cpu_temp'])
-            dirty_rects.append(self.rects['usage'])
-            for key in ['cpu_usage', 'memory_usage', 'disk_usage', 'cpu_temp']:
+        # 更新系统使用率的圆环, 每个仪表只在自身显示值变化时重绘
+        for key, gauge in self.gauges.items():
+            rect = gauge.update(data[key])
+            if rect:
+                dirty_rects.append(rect)
                 self.old_data[key] = data[key]
 
+    def update_sparklines(self, widget, data, dirty_rects):
+        # 每个显示的整秒(收到第一份数据后)为各遥测量记录一个样本, 折线图只在有新样本时滚动
+        if data.version and data['time'] != self.history_time:
+            self.history_time = data['time']
+            for key in widget.keys:
+                self.history[key].append(data[key])
+        for sparkline in self.sparklines:
+            rect = sparkline.update()
+            if rect:
+                dirty_rects.append(rect)
+
     def update_network_info(self, data, dirty_rects):
         # 更新网络信息
         if any(data[key] != self.old_data[key] for key in ['ip', 'upload_speed', 'download_speed']):
             if self.rects['network']:
                 self.clear_rect(self.rects['network'])
-            self.rects['network'] = self.draw_network_info(data['ip'], data['upload_speed'], data['download_speed'], (self.width // 2, self.height - 50))
+                dirty_rects.append(self.rects['network'])
+            self.rects['network'] = self.draw_network_info(data['ip'], data['upload_speed'], data['download_speed'], self.layout.positions['network'])
             dirty_rects.append(self.rects['network'])
             for key in ['ip', 'upload_speed', 'download_speed']:
                 self.old_data[key] = data[key]
 
     def clear_rect(self, rect):
-        # 清除矩形区域
-        pygame.draw.rect(self.screen, BACKGROUND_COLOR, rect.inflate(10, 10))
+        # 清除矩形区域, 并重绘与之相交的静态图层、仪表和数字格子(只重绘清除区域以内的部分)
+        self.screen.fill(BACKGROUND_COLOR, rect)
+        for layer, layer_rect in self.static_layers:
+            overlap = rect.clip(layer_rect)
+            if overlap.width and overlap.height:
+                self.screen.blit(layer, overlap, overlap.move(-layer_rect.x, -layer_rect.y))
+
+        self.screen.set_clip(rect)
+        for gauge in self.gauges.values():
+            if gauge.rect.colliderect(rect):
+                gauge.draw()
+        for cell_rect, char in zip(self.cell_rects, self.old_data['time']):
+            if cell_rect.colliderect(rect) and char in self.digit_atlas:
+                self.screen.blit(self.digit_atlas[char], cell_rect)
+        for sparkline in self.sparklines:
+            if sparkline.rect.colliderect(rect):
+                self.screen.blit(sparkline.surface, sparkline.rect)
+        self.screen.set_clip(None)
 
     def render_text(self, font, text, position, alignment='center'):
-        lines = text.split('\n')
+        lines = self.text_layout.wrap(font, text)
         y_offset = 0
-        max_width = 0
         rects = []
         for line in lines:
             surface, rect = self.get_rendered_text(font, line, (255, 255, 255))
@@ -184,24 +1153,19 @@ class FlipClock:
                 rect.topright = (position[0], position[1] + y_offset)
             self.screen.blit(surface, rect)
             y_offset += rect.height
-            max_width = max(max_width, rect.width)
             rects.append(rect)
-        
-        # Calculate the bounding rect for all lines
-        bounding_rect = pygame.Rect(position[0] - max_width // 2, position[1], max_width, y_offset)
 
-        return bounding_rect
+        # 所有行实际绘制范围的并集
+        return rects[0].unionall(rects[1:])
 
     def render_wrapped_text(self, font, text, position, max_width, alignment='left'):
         # 渲染自动换行的文本
         lines = self.wrap_text(font, text, max_width)
         x, y = position
-        total_height = sum([font.get_sized_height() for line in lines])
-        y = total_height
         rects = []
 
         for line in lines:
-            surface, rect = font.render(line, (255, 255, 255))
+            surface, rect = self.get_rendered_text(font, line, (255, 255, 255))
             if alignment == 'center':
                 rect.centerx = x
             elif alignment == 'right':
@@ -213,107 +1177,93 @@ class FlipClock:
             rects.append(rect)
             y += font.get_sized_height()
 
-        return pygame.Rect(x - max_width // 2, y - total_height, max_width, total_height)
+        # 所有行实际绘制范围的并集
+        return rects[0].unionall(rects[1:])
 
     def wrap_text(self, font, text, max_width):
         # 自动换行处理
-        words = text.split()
-        lines = []
-        current_line = []
-
-        for word in words:
-            current_line.append(word)
-            line_width, _ = font.get_rect(' '.join(current_line)).size
-            if line_width > max_width:
-                current_line.pop()
-                lines.append(' '.join(current_line))
-                current_line = [word]
-
-        if current_line:
-            lines.append(' '.join(current_line))
+        return list(self.text_layout.wrap(font, text, max_width))
 
-        return lines
-
-    def render_flip_numbers(self, current_time):
-        # 渲染翻页时钟数字
-        flip_rect = pygame.Rect(self.x_start - 10, self.y_start - FRAME_PADDING - 10, 8 * DIGIT_WIDTH + 7 * MARGIN + 20, DIGIT_HEIGHT + 2 * FRAME_PADDING + 20)
+    def render_flip_numbers(self, current_time, previous_time=''):
+        # 渲染翻页时钟数字, 只重绘字符发生变化的格子, 返回这些格子的矩形
+        changed_rects = []
         for i, char in enumerate(current_time):
-            rect_x = self.x_start + i * (DIGIT_WIDTH + MARGIN)
-            if char.isdigit():
-                # 绘制背景框
-                pygame.draw.rect(self.screen, FRAME_COLOR, (rect_x, self.y_start - FRAME_PADDING, DIGIT_WIDTH, DIGIT_HEIGHT + 2 * FRAME_PADDING), border_radius=10)
-                # 绘制数字
-                digit_surface, digit_rect = self.get_rendered_text(self.fonts['digit'], char, DIGIT_COLOR)
-                digit_rect.center = (rect_x + DIGIT_WIDTH // 2, self.y_start + DIGIT_HEIGHT // 2)
-            else:
-                # 绘制冒号，不加背景框
-                digit_surface, digit_rect = self.get_rendered_text(self.fonts['digit'], char, DIGIT_COLOR)
-                digit_rect.center = (rect_x + DIGIT_WIDTH // 2, self.y_start + DIGIT_HEIGHT // 2)
-            self.screen.blit(digit_surface, digit_rect)
-        return flip_rect
+            if i < len(previous_time) and previous_time[i] == char:
+                continue
+            tile = self.digit_atlas.get(char)
+            if tile is None:
+                continue
+            old_char = previous_time[i] if i < len(previous_time) else ''
+            if old_char in self.flip_halves and char in self.flip_halves:
+                # 交给动画逐帧绘制
+                self.flips[i] = (old_char, char, time.perf_counter(), -1)
+                continue
+            self.screen.blit(tile, self.cell_rects[i])
+            changed_rects.append(self.cell_rects[i])
+        return changed_rects
+
+    def update_flips(self, dirty_rects):
+        # 按时间推进翻页动画; 主循环落后于帧预算时跳过中间帧, 只保证动画按时结束
+        if not self.flips:
+            return
+        now = time.perf_counter()
+        for i, (old_char, new_char, start, drawn_step) in list(self.flips.items()):
+            progress = (now - start) / FLIP_DURATION
+            if progress >= 1:
+                self.screen.blit(self.digit_atlas[new_char], self.cell_rects[i])
+                dirty_rects.append(self.cell_rects[i])
+                del self.flips[i]
+                continue
+            step = int(progress * 2 * FLIP_STEPS)
+            if step == drawn_step or self.frame_budget_exceeded:
+                continue
+            self.draw_flip_frame(self.cell_rects[i], old_char, new_char, step)
+            dirty_rects.append(self.cell_rects[i])
+            self.flips[i] = (old_char, new_char, start, step)
+
+    def draw_flip_frame(self, rect, old_char, new_char, step):
+        # 前半程旧数字的上半页从完整高度向下折叠, 后半程新数字的下半页展开到完整高度
+        old_tile, new_tile = self.digit_atlas[old_char], self.digit_atlas[new_char]
+        half = rect.height // 2
+        self.screen.blit(new_tile, rect.topleft, (0, 0, rect.width, half))
+        self.screen.blit(old_tile, (rect.x, rect.y + half), (0, half, rect.width, rect.height - half))
+        if step < FLIP_STEPS:
+            folding = self.flip_halves[old_char]['top'][FLIP_STEPS - 1 - step]
+            self.screen.blit(folding, (rect.x, rect.y + half - folding.get_height()))
+        else:
+            unfolding = self.flip_halves[new_char]['bottom'][step - FLIP_STEPS]
+            self.screen.blit(unfolding, (rect.x, rect.y + half))
 
     def get_rendered_text(self, font, text, color):
         # 如果文本未缓存，则渲染并缓存
-        if text not in self.rendered_text_cache:
-            self.rendered_text_cache[text] = font.render(text, color)
-        return self.rendered_text_cache[text]
-
-    def draw_usage_circles(self, cpu_usage, memory_usage, disk_usage, cpu_temp):
-        # 绘制系统使用率的圆环
-        usage_rect = pygame.Rect(self.width // 2 - 270, self.height - 200, 540, 120)
-        total_width = 4 * 120  # 每个圆环和标签的总宽度，包括间距
-        start_x = (self.width - total_width) // 2 + 60  # 向右移动半个圆环的距离
-        y = self.height - 140
-        
-        self.draw_usage_circle(start_x, y, cpu_usage, "CPU", (0, 255, 0))
-        self.draw_usage_circle(start_x + 120, y, memory_usage, "MEM", (0, 255, 0))
-        self.draw_usage_circle(start_x + 240, y, disk_usage, "DISK", (0, 255, 0))
-        self.draw_temp_circle(start_x + 360, y, cpu_temp, "TEMP", (255, 0, 0))
-        return usage_rect
-
-    def draw_usage_circle(self, x, y, usage, label, color):
-        # 绘制使用率圆环
-        radius = 50
-        thickness = 10
-        start_angle = 0
-        end_angle = 360 * (usage / 100)
-
-        # 绘制背景圆环
-        pygame.draw.circle(self.screen, (100, 100, 100), (x, y), radius, thickness)
-
-        # 绘制前景圆环
-        pygame.draw.arc(self.screen, color, 
-                        (x - radius, y - radius, 2 * radius, 2 * radius), 
-                        math.radians(start_angle), math.radians(end_angle), thickness)
-
-        # 绘制标签文本在圆环的上方
-        self.render_text(self.fonts['label'], label, (x, y - 20))
-
-        # 绘制使用率文本
-        usage_text = f"{int(usage)}%"
-        self.render_text(self.fonts['usage'], usage_text, (x, y + 10))
-
-    def draw_temp_circle(self, x, y, temp, label, color):
-        # 绘制温度圆环
-        radius = 50
-        thickness = 10
-        start_angle = 0
-        end_angle = 360 * (temp / 100)  # 假设最大温度为100°C
-
-        # 绘制背景圆环
-        pygame.draw.circle(self.screen, (100, 100, 100), (x, y), radius, thickness)
-
-        # 绘制前景圆环
-        pygame.draw.arc(self.screen, color, 
-                        (x - radius, y - radius, 2 * radius, 2 * radius), 
-                        math.radians(start_angle), math.radians(end_angle), thickness)
-
-        # 绘制标签文本在圆环的上方
-        self.render_text(self.fonts['label'], label, (x, y - 20))
-
-        # 绘制温度文本
-        temp_text = f"{int(temp)}°C"
-        self.render_text(self.fonts['usage'], temp_text, (x, y + 10))
+        return self.rendered_text_cache.get(font, text, color)
+
+    def init_gauges(self):
+        # 创建系统使用率的圆环仪表, 圆心位置取自布局; 禁用使用率部件时不创建
+        if not any(widget.name == 'usage' for widget in self.widget_specs):
+            return {}
+        cpu, memory, disk, temp = self.layout.gauge_centers
+        return {
+            'cpu_usage': Gauge(self, cpu, "CPU", (0, 255, 0), "%"),
+            'memory_usage': Gauge(self, memory, "MEM", (0, 255, 0), "%"),
+            'disk_usage': Gauge(self, disk, "DISK", (0, 255, 0), "%"),
+            'cpu_temp': Gauge(self, temp, "TEMP", (255, 0, 0), "°C")  # 假设最大温度为100°C
+        }
+
+    def init_sparklines(self):
+        # 创建遥测折线图, 历史缓冲区在调整窗口大小后继续沿用; 禁用history部件时不创建
+        widget = next((widget for widget in self.widget_specs if widget.name == 'history'), None)
+        if widget is None:
+            return []
+        for key in widget.keys:
+            if key not in self.history:
+                self.history[key] = SeriesHistory()
+        # (字段, 颜色, 纵轴上限), 上限为None时自动缩放
+        series = [('cpu_usage', (0, 255, 0), 100), ('memory_usage', (0, 255, 0), 100), ('disk_usage', (0, 255, 0), 100),
+                  ('cpu_temp', (255, 0, 0), 100), ('upload_speed', (0, 255, 0), None), ('download_speed', (255, 0, 0), None)]
+        rects = self.layout.gauge_sparklines + self.layout.network_sparklines
+        return [Sparkline(self, rect, self.history[key].level(SPARKLINE_RESOLUTION), color, maximum)
+                for rect, (key, color, maximum) in zip(rects, series)]
 
     def draw_network_info(self, ip_address, upload_speed, download_speed, position):
         # 绘制网络信息
@@ -332,261 +1282,1101 @@ class FlipClock:
         up_x = ip_x + ip_rect.width + 20
         down_x = up_x + up_rect.width + 20
 
-        self.screen.blit(ip_surface, (ip_x, y - ip_rect.height // 2))
-        self.screen.blit(up_surface, (up_x, y - up_rect.height // 2))
-        self.screen.blit(down_surface, (down_x, y - down_rect.height // 2))
-        return pygame.Rect(ip_x, y - ip_rect.height // 2, total_width, max(ip_rect.height, up_rect.height, down_rect.height))
+        ip_rect = self.screen.blit(ip_surface, (ip_x, y - ip_rect.height // 2))
+        up_rect = self.screen.blit(up_surface, (up_x, y - up_rect.height // 2))
+        down_rect = self.screen.blit(down_surface, (down_x, y - down_rect.height // 2))
+        return ip_rect.unionall([up_rect, down_rect])
 
     def draw_image(self):
         # 绘制静态图片在右下角
-        self.image_rect.bottomright = (self.width - 10, self.height - 10)
+        self.image_rect.bottomright = self.layout.image_bottomright
         self.screen.blit(self.image, self.image_rect)
 
 
+class HttpClient:
+    # 共享的HTTP客户端: 长连接复用, 显式超时, 遵循ETag/Last-Modified和Cache-Control, 响应缓存落盘
+    def __init__(self, cache_dir=os.path.join(CACHE_DIR, 'http'), timeout=HTTP_TIMEOUT, pool_size=HTTP_POOL_SIZE):
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.session = None  # 第一次请求时才导入requests并创建会话
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get_json(self, url, cache=True):
+        # 缓存仍新鲜时直接返回, 否则带上验证头发起条件请求, 304时沿用缓存内容
+        # cache=False用于每次请求返回不同内容的接口(如一言), 不读写缓存
+        entry = self.load_entry(url) if cache else None
+        if entry and entry['expires'] > time.time():
+            return json.loads(entry['body'])
+
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        with metrics.timer(f"http.{urlsplit(url).netloc}"):
+            response = self.get_session().get(url, headers=headers, timeout=self.timeout)
+
+        if response.status_code == 304 and entry:
+            # 内容没变, 只在内存中更新过期时间, 不重写缓存文件; 重启后最多多发一次条件请求
+            with self.lock:
+                entry['expires'] = self.expires_at(response.headers)
+            return json.loads(entry['body'])
+
+        response.raise_for_status()
+        with metrics.timer('http.json_parse'):
+            data = response.json()
+        if cache and 'no-store' not in response.headers.get('Cache-Control', ''):
+            self.save_entry(url, {
+                'body': response.text,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'expires': self.expires_at(response.headers)
+            })
+        return data
+
+    def get_session(self):
+        with self.lock:
+            if self.session is None:
+                import requests
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self.session = session
+            return self.session
+
+    @staticmethod
+    def expires_at(headers):
+        # 根据Cache-Control的max-age或Expires计算过期时间, 没有缓存指示时视为立即过期
+        directives = [d.strip().lower() for d in headers.get('Cache-Control', '').split(',')]
+        if 'no-cache' in directives or 'no-store' in directives:
+            return 0
+        for directive in directives:
+            if directive.startswith('max-age='):
+                try:
+                    return time.time() + int(directive[len('max-age='):]) - int(headers.get('Age', 0))
+                except ValueError:
+                    return 0
+        if headers.get('Expires'):
+            try:
+                return parsedate_to_datetime(headers['Expires']).timestamp()
+            except (TypeError, ValueError):
+                return 0
+        return 0
+
+    def cache_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+    def load_entry(self, url):
+        with self.lock:
+            if url not in self.entries:
+                try:
+                    with open(self.cache_path(url), 'r', encoding='utf-8') as f:
+                        self.entries[url] = json.load(f)
+                except (OSError, ValueError):
+                    self.entries[url] = None
+            return self.entries[url]
+
+    def save_entry(self, url, entry):
+        with self.lock:
+            self.entries[url] = entry
+            try:
+                # 先写临时文件再替换, 避免断电时留下半个缓存文件
+                os.makedirs(self.cache_dir, exist_ok=True)
+                path = self.cache_path(url)
+                with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                    json.dump(entry, f, ensure_ascii=False)
+                os.replace(path + '.tmp', path)
+            except OSError:
+                pass
+
+
+http_client = HttpClient()
+
+
+class OfflineStore:
+    # 离线数据存储(SQLite): 保存各数据源最近一次的有效值和获取时间, 以及预取的一言池
+    # 重启后先显示保存的值, 网络失败时屏幕上保留旧值
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS latest (source TEXT PRIMARY KEY, value TEXT NOT NULL, fetched_at REAL NOT NULL);
+        CREATE TABLE IF NOT EXISTS hitokoto (id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT NOT NULL UNIQUE,
+                                             fetched_at REAL NOT NULL, shown_at REAL);
+    '''
+
+    def __init__(self, path=OFFLINE_STORE_PATH):
+        self.path = path
+        self.db = None  # 第一次使用时才打开
+        self.lock = threading.Lock()
+
+    def connect(self):
+        if self.db is None:
+            import sqlite3
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                db = sqlite3.connect(self.path, check_same_thread=False)
+                # WAL模式下synchronous=NORMAL只在检查点时fsync, 频繁的小事务(一言轮换、定期保存)不再每次都刷盘, 减少SD卡写入
+                # 断电最多丢失最近几次提交, 数据库不会损坏
+                db.execute('PRAGMA journal_mode=WAL')
+                db.execute('PRAGMA synchronous=NORMAL')
+                db.executescript(self.SCHEMA)
+            except (OSError, sqlite3.Error) as e:
+                # 缓存目录不可写时退回内存数据库, 只是重启后不再保留数据
+                print(f"离线数据库打开失败, 改用内存数据库: {e}", file=sys.stderr)
+                db = sqlite3.connect(':memory:', check_same_thread=False)
+                db.executescript(self.SCHEMA)
+            self.db = db
+        return self.db
+
+    def put(self, source, value):
+        with self.lock, self.connect() as db:
+            db.execute('INSERT OR REPLACE INTO latest VALUES (?, ?, ?)',
+                       (source, json.dumps(value, ensure_ascii=False), time.time()))
+
+    def age(self, source):
+        # 保存的值距今的秒数, 没有保存过时返回None
+        with self.lock:
+            row = self.connect().execute('SELECT fetched_at FROM latest WHERE source = ?', (source,)).fetchone()
+        return None if row is None else time.time() - row[0]
+
+    def latest_values(self):
+        with self.lock:
+            rows = self.connect().execute('SELECT source, value FROM latest').fetchall()
+        return {source: json.loads(value) for source, value in rows}
+
+    def add_hitokoto(self, texts):
+        # 加入一批一言(重复的忽略), 超出上限时删除最早获取的
+        now = time.time()
+        with self.lock, self.connect() as db:
+            db.executemany('INSERT OR IGNORE INTO hitokoto (text, fetched_at) VALUES (?, ?)', [(text, now) for text in texts])
+            db.execute('DELETE FROM hitokoto WHERE id NOT IN (SELECT id FROM hitokoto ORDER BY id DESC LIMIT ?)',
+                       (HITOKOTO_POOL_MAX,))
+
+    def next_hitokoto(self):
+        # 轮换到下一条: 优先未展示过的, 否则取最久之前展示的; 池为空时返回None
+        with self.lock, self.connect() as db:
+            row = db.execute('SELECT id, text FROM hitokoto ORDER BY shown_at, id LIMIT 1').fetchone()
+            if row is None:
+                return None
+            db.execute('UPDATE hitokoto SET shown_at = ? WHERE id = ?', (time.time(), row[0]))
+        return row[1]
+
+    def unseen_hitokoto(self):
+        with self.lock:
+            return self.connect().execute('SELECT COUNT(*) FROM hitokoto WHERE shown_at IS NULL').fetchone()[0]
+
+
+offline_store = OfflineStore()
+
+
+@dataclass(frozen=True, slots=True)
+class TelemetrySample:
+    # 一次批量采样的结果; 各网卡、挂载点和热区为 (名称, 数值) 元组
+    cpu: float = 0.0
+    cores: tuple = ()  # 每个核心的使用率
+    memory: float = 0.0
+    disks: tuple = ()  # (挂载点, 使用率)
+    disk_read: float = 0.0
+    disk_write: float = 0.0
+    nics: tuple = ()  # (网卡, 上行Mbps, 下行Mbps)
+    temps: tuple = ()  # (热区, 摄氏度)
+
+
+class ThermalZones:
+    # 读取所有热区的温度: sysfs文件只打开一次, 之后每次采样seek(0)后重读
+    def __init__(self, root=THERMAL_ROOT):
+        self.root = root
+        self.handles = None  # {热区名: 文件}, 第一次读取时才扫描
+
+    def discover(self):
+        try:
+            names = sorted(name for name in os.listdir(self.root) if name.startswith('thermal_zone'))
+        except OSError:
+            names = []
+        handles = {}
+        for name in names:
+            try:
+                handles[name] = open(os.path.join(self.root, name, 'temp'), 'rb', buffering=0)
+            except OSError:
+                pass
+        return handles
+
+    def read(self):
+        if self.handles is None:
+            self.handles = self.discover()
+        temps = []
+        for name, handle in list(self.handles.items()):
+            try:
+                handle.seek(0)
+                temps.append((name, int(handle.read()) / 1000))  # 单位为毫摄氏度
+            except ValueError:
+                pass
+            except OSError:
+                # 热区已消失或不支持读取, 不再尝试
+                handle.close()
+                del self.handles[name]
+        return tuple(temps)
+
+
+def selected_interfaces(names):
+    # 参与统计的网卡: 配置了NETWORK_INTERFACES时按配置, 否则为所有非回环、非虚拟网卡
+    if NETWORK_INTERFACES:
+        return [name for name in NETWORK_INTERFACES if name in names]
+    return [name for name in names if not name.startswith(VIRTUAL_INTERFACE_PREFIXES)]
+
+
+class TelemetrySampler:
+    # 非阻塞的系统遥测采样: 保存上一次的计数器快照, 用两次采样之间的差值计算使用率和速率, 不需要sleep
+    # 每个周期只调用一次sample(), 每个psutil计数器只读取一次, 覆盖所有核心、网卡、挂载点和热区
+    def __init__(self, smoothing=TELEMETRY_SMOOTHING):
+        self.smoothing = smoothing
+        self.snapshots = {}  # {名称: (采样时间, 计数器)}
+        self.smoothed = {}
+        self.thermal = ThermalZones()
+        self.ip_index = -1
+        self.lock = threading.Lock()
+
+    def swap_snapshot(self, name, counters):
+        # 保存本次快照并返回 (距上次的秒数, 上次的计数器), 首次采样返回 (0, None)
+        now = time.monotonic()
+        with self.lock:
+            previous = self.snapshots.get(name)
+            self.snapshots[name] = (now, counters)
+        if previous is None:
+            return 0, None
+        return now - previous[0], previous[1]
+
+    def smooth(self, key, value):
+        # 指数加权移动平均
+        with self.lock:
+            if self.smoothing and key in self.smoothed:
+                value = self.smoothing * self.smoothed[key] + (1 - self.smoothing) * value
+            self.smoothed[key] = value
+        return value
+
+    def sample(self):
+        import psutil
+        cpu, cores = self.cpu_percents(psutil.cpu_times(percpu=True))
+        disks = []
+        for path in DISK_PATHS:
+            try:
+                disks.append((path, psutil.disk_usage(path).percent))
+            except OSError:
+                pass
+        disk_read, disk_write = self.disk_io_speed(psutil.disk_io_counters())
+        return TelemetrySample(cpu=cpu, cores=cores, memory=psutil.virtual_memory().percent, disks=tuple(disks),
+                               disk_read=disk_read, disk_write=disk_write,
+                               nics=self.network_speeds(psutil.net_io_counters(pernic=True)), temps=self.thermal.read())
+
+    @staticmethod
+    def busy_percent(times, previous):
+        # Linux上guest和guest_nice已计入user和nice, 求总时间时要减去, 否则跑虚拟机时使用率偏低
+        idle = (times.idle + getattr(times, 'iowait', 0)) - (previous.idle + getattr(previous, 'iowait', 0))
+        total = TelemetrySampler.total_time(times) - TelemetrySampler.total_time(previous)
+        if total <= 0:
+            return None
+        return max(0.0, min(100.0, 100 * (total - idle) / total))
+
+    @staticmethod
+    def total_time(times):
+        return sum(times) - getattr(times, 'guest', 0) - getattr(times, 'guest_nice', 0)
+
+    def cpu_percents(self, per_core):
+        # 由每核心的时间计算各核心和整体使用率, 整体使用率为各核心差值之和
+        _, previous = self.swap_snapshot('cpu', per_core)
+        if previous is None or len(previous) != len(per_core):
+            return 0.0, ()
+        cores = tuple(self.busy_percent(times, old) or 0.0 for times, old in zip(per_core, previous))
+        cpu_times = type(per_core[0])._make
+        total = self.busy_percent(cpu_times(map(sum, zip(*per_core))), cpu_times(map(sum, zip(*previous))))
+        return self.smooth('cpu', self.smoothed.get('cpu', 0.0) if total is None else total), cores
+
+    def network_speeds(self, counters):
+        # 各网卡的上行和下行速度(Mbps); 新出现的网卡从下一次采样开始统计
+        elapsed, previous = self.swap_snapshot('net', counters)
+        if not elapsed:
+            return ()
+        speeds = []
+        for name, current in counters.items():
+            if name not in previous:
+                continue
+            upload = max(0.0, (current.bytes_sent - previous[name].bytes_sent) * 8 / 1e6 / elapsed)
+            download = max(0.0, (current.bytes_recv - previous[name].bytes_recv) * 8 / 1e6 / elapsed)
+            speeds.append((name, self.smooth(f"upload.{name}", upload), self.smooth(f"download.{name}", download)))
+        return tuple(speeds)
+
+    def disk_io_speed(self, counters):
+        # 磁盘的读写速度(MB/s)
+        elapsed, previous = self.swap_snapshot('disk', counters)
+        if not elapsed or counters is None or previous is None:
+            return 0.0, 0.0
+        read = (counters.read_bytes - previous.read_bytes) / 1e6 / elapsed
+        write = (counters.write_bytes - previous.write_bytes) / 1e6 / elapsed
+        return self.smooth('disk_read', max(0.0, read)), self.smooth('disk_write', max(0.0, write))
+
+    def next_ip(self):
+        # 轮流返回各网卡的IPv4地址, 有多个网卡时附上网卡名
+        import psutil
+        addrs = psutil.net_if_addrs()
+        entries = [(name, addr.address) for name in selected_interfaces(addrs)
+                   for addr in addrs[name] if addr.family == socket.AF_INET]
+        if not entries:
+            return "IP获取失败"
+        self.ip_index = (self.ip_index + 1) % len(entries)
+        name, address = entries[self.ip_index]
+        return address if len(entries) == 1 else f"{address} ({name})"
+
+
+telemetry = TelemetrySampler()
+
+
+class DateService:
+    # 日期服务: 公历和农历字符串每天只计算一次, 调度器定期检查, 日期变化(或系统校时)后才重新计算
+    # 可选地把整年的农历日期预先计算成紧凑的二进制年表存到磁盘, 冷启动时直接查表, 不再调用农历转换
+    RECORD = struct.Struct('<HBBB')  # 每天一条: 农历年, 月, 日, 是否闰月
+
+    def __init__(self, table_dir=LUNAR_TABLE_DIR, precompute=PRECOMPUTE_LUNAR_TABLE):
+        self.table_dir = table_dir
+        self.precompute = precompute
+        self.tables = {}
+        self.cached_day = None
+        self.cached_strings = None
+        self.lock = threading.Lock()
+
+    def get_date_strings(self):
+        now = time.localtime()
+        day = (now.tm_year, now.tm_mon, now.tm_mday)
+        with self.lock:
+            if day != self.cached_day:
+                lunar_year, lunar_month, lunar_day, _ = self.lunar(now.tm_year, now.tm_mon, now.tm_mday)
+                self.cached_strings = (time.strftime('%Y-%m-%d %A', now),
+                                       f"农历 {lunar_year}年{lunar_month}月{lunar_day}日")
+                self.cached_day = day
+            return self.cached_strings
+
+    @staticmethod
+    def convert(year, month, day):
+        # 公历转农历: (农历年, 月, 日, 是否闰月)
+        from lunarcalendar import Converter, Solar
+        lunar = Converter.Solar2Lunar(Solar(year, month, day))
+        return lunar.year, lunar.month, lunar.day, int(lunar.isleap)
+
+    def lunar(self, year, month, day):
+        if not self.precompute:
+            return self.convert(year, month, day)
+        table = self.load_table(year)
+        offset = (datetime.date(year, month, day).toordinal() - datetime.date(year, 1, 1).toordinal()) * self.RECORD.size
+        return self.RECORD.unpack_from(table, offset)
+
+    def table_path(self, year):
+        return os.path.join(self.table_dir, f"{year}.bin")
+
+    def load_table(self, year):
+        # 优先读取内存和磁盘上的年表, 都没有时计算整年并保存
+        if year in self.tables:
+            return self.tables[year]
+        days = datetime.date(year + 1, 1, 1).toordinal() - datetime.date(year, 1, 1).toordinal()
+        try:
+            with open(self.table_path(year), 'rb') as f:
+                table = f.read()
+            if len(table) != days * self.RECORD.size:
+                raise ValueError('农历年表长度不正确')
+        except (OSError, ValueError):
+            start = datetime.date(year, 1, 1)
+            table = b''.join(self.RECORD.pack(*self.convert(date.year, date.month, date.day))
+                             for date in (start + datetime.timedelta(days=i) for i in range(days)))
+            try:
+                os.makedirs(self.table_dir, exist_ok=True)
+                with open(self.table_path(year) + '.tmp', 'wb') as f:
+                    f.write(table)
+                os.replace(self.table_path(year) + '.tmp', self.table_path(year))
+            except OSError:
+                pass
+        self.tables = {year: table}  # 只保留当年的年表
+        return table
+
+
+date_service = DateService()
+
+
 class Utils:
     @staticmethod
     def gold_price_zh():
-        # 实时金价
-        msg = ''
-        try:
-            resp = requests.get(GOLD_PRICE_API).json()
-            gn = resp['gn'][0]
-            price = gn['price']
-            changepercent = gn['changepercent']
-            msg = f">> 国内金价: {price}元/g({changepercent})"
-        except Exception:
-            pass
-        return msg
+        # 实时金价, 获取失败时抛出异常
+        resp = http_client.get_json(GOLD_PRICE_API)
+        gn = resp['gn'][0]
+        price = gn['price']
+        changepercent = gn['changepercent']
+        return f">> 国内金价: {price}元/g({changepercent})"
 
     
     @staticmethod
     def gold_price_store(num=1):
-        # 实时金价
+        # 各品牌金价, 获取失败时抛出异常
         msg = ''
-        try:
-            resp = requests.get(GOLD_PRICE_STORE_API).json()
-            for i in range(num):
-                brand = resp['brand'][i]
-                title = brand['title']
-                gold = brand['gold']
-                msg += f">> {title}: {gold}元/g\n"
-        except Exception:
-            pass
+        resp = http_client.get_json(GOLD_PRICE_STORE_API)
+        for i in range(num):
+            brand = resp['brand'][i]
+            title = brand['title']
+            gold = brand['gold']
+            msg += f">> {title}: {gold}元/g\n"
         return msg.strip()
     
     
     @staticmethod
-    def get_time_strings():
+    def get_time_strings(timestamp=None):
         # 获取当前时间
-        now = time.localtime()
+        now = time.localtime(timestamp)
         return time.strftime('%H:%M:%S', now)
 
     @staticmethod
-    def get_date_strings():
-        # 获取当前日期和农历日期
-        now = time.localtime()
-        current_date = time.strftime('%Y-%m-%d %A', now)
-
-        # 转换为农历日期
-        solar = Solar(now.tm_year, now.tm_mon, now.tm_mday)
-        lunar = Converter.Solar2Lunar(solar)
-        lunar_date = f"农历 {lunar.year}年{lunar.month}月{lunar.day}日"
-        return current_date, lunar_date
-
-    @staticmethod
-    def get_ip_address(interface):
-        # 获取指定网络接口的IP地址
-        try:
-            addrs = psutil.net_if_addrs()
-            return [addr.address for addr in addrs[interface] if addr.family == 2][0]
-        except Exception:
-            return "IP获取失败"
+    def ms_until_next_second():
+        # 距离下一个整秒的毫秒数, 多等1毫秒确保醒来时已跨过整秒; 在等待前调用, 绘制耗时跨过整秒时也不会算出负数
+        # 至少为1毫秒: pygame.event.wait(0)表示无限等待
+        now = time.time()
+        return max(1, int((math.floor(now) + 1 - now) * 1000) + 1)
 
     @staticmethod
-    def get_hitokoto():
-        # 从API获取一言
-        try:
-            response = requests.get(HITOKOTO_API)
-            if response.status_code == 200:
-                data = response.json()
-                return f"{data.get('hitokoto', '')} —— {data.get('from', '')}"
-            else:
-                return "无法获取一言"
-        except Exception:
-            return "一言获取失败"
+    def get_date_strings():
+        # 获取当前日期和农历日期, 每天只计算一次
+        return date_service.get_date_strings()
 
     @staticmethod
-    def get_system_usage():
-        # 获取系统CPU、内存和磁盘使用率
-        cpu_usage = psutil.cpu_percent(interval=1)
-        memory_info = psutil.virtual_memory()
-        memory_usage = memory_info.percent
-        disk_usage = psutil.disk_usage('/').percent
-        return cpu_usage, memory_usage, disk_usage
+    def get_ip_address():
+        # 获取IP地址, 有多个网卡时每次调用轮换到下一个网卡
+        return telemetry.next_ip()
 
     @staticmethod
-    def get_network_speed(interface):
-        # 获取网络接口的上行和下行速度
-        net_io = psutil.net_io_counters(pernic=True)
-        upload_speed = net_io[interface].bytes_sent
-        download_speed = net_io[interface].bytes_recv
-        time.sleep(0.1)
-        net_io = psutil.net_io_counters(pernic=True)
-        upload_speed = (net_io[interface].bytes_sent - upload_speed) * 8 / 1e6
-        download_speed = (net_io[interface].bytes_recv - download_speed) * 8 / 1e6
-        return upload_speed, download_speed
+    def get_hitokoto():
+        # 从API获取一言, 获取失败时抛出异常
+        data = http_client.get_json(HITOKOTO_API, cache=False)
+        return f"{data['hitokoto']} —— {data.get('from', '')}"
 
     @staticmethod
-    def get_cpu_temp():
-        # 获取CPU温度
-        temp_file = '/sys/class/thermal/thermal_zone0/temp'
-        try:
-            with open(temp_file, 'r') as f:
-                temp = f.read()
-                return int(temp) / 1000  # 假设读取到的温度值是毫摄氏度，需要转换为摄氏度
-        except:
-            return 0
+    def get_telemetry():
+        # 批量采样CPU(含每核心)、内存、各挂载点、磁盘读写、各网卡网速和各热区温度, 速率和使用率为距上次调用期间的平均值
+        return telemetry.sample()
 
     @staticmethod
     def get_gold_price():
-        # 获取实时金价
-        try:
-            price_zh = Utils.gold_price_zh()
-            price_store = Utils.gold_price_store(num=4)
-            return price_zh+'\n'+price_store
-        except Exception as e:
-            print(e)
-            return "<金价获取失败>"
+        # 获取实时金价, 获取失败时抛出异常, 由采集任务保留上次的有效值
+        price_zh = Utils.gold_price_zh()
+        price_store = Utils.gold_price_store(num=4)
+        return price_zh+'\n'+price_store
 
     @staticmethod
     def get_weather():
-        # 获取天气信息
-        try:
-            response = requests.get(WEATHER_API)
-            if response.status_code == 200:
-                data = response.json()
-                if data['success']:
-                    weather = data['data']
-                    return f"{weather['type']} {weather['low']}~{weather['high']}\n{data['tip']}"
+        # 获取天气信息, 获取失败时抛出异常
+        data = http_client.get_json(WEATHER_API)
+        if not data['success']:
+            raise ValueError('天气接口返回失败')
+        weather = data['data']
+        return f"{weather['type']} {weather['low']}~{weather['high']}\n{data['tip']}"
+
+
+@dataclass(frozen=True, slots=True)
+class DataSnapshot:
+    # 不可变的数据快照, 采集数据每次变化都会发布一个version更大的新快照
+    version: int = 0
+    time: str = ""
+    date: str = " "
+    lunar_date: str = " "
+    ip: str = " "
+    hitokoto: str = " "
+    upload_speed: float = 0.0
+    download_speed: float = 0.0
+    cpu_usage: float = 0.0
+    memory_usage: float = 0.0
+    disk_usage: float = 0.0
+    cpu_temp: float = 0.0
+    gold_price: str = " "
+    weather: str = " "
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+
+class SnapshotChannel:
+    # 快照通道: 采集线程合并发布新快照, 渲染循环以O(1)读取最新版本
+    # 渲染循环来不及读取的中间版本会被直接覆盖, 不会积压过期数据
+    def __init__(self, notify=None):
+        self.snapshot = DataSnapshot()
+        self.notify = notify  # 有新快照时的回调, 用于唤醒渲染循环; 上次通知被读取前不会重复通知
+        self.notified = False
+        self.lock = threading.Lock()
+
+    def publish(self, changes):
+        with self.lock:
+            changes = {key: value for key, value in changes.items() if getattr(self.snapshot, key) != value}
+            if not changes:
+                return
+            self.snapshot = replace(self.snapshot, version=self.snapshot.version + 1, **changes)
+            should_notify = self.notify and not self.notified
+            self.notified = True
+        if should_notify:
+            self.notify()
+
+    def latest(self):
+        self.notified = False
+        return self.snapshot
+
+
+class Collector:
+    # 数据采集任务: 按各自的间隔独立运行, 返回 {键: 值}
+    def __init__(self, name, func, interval, timeout, retry=None, initial_delay=0):
+        self.name = name
+        self.func = func
+        self.interval = interval  # 运行间隔(秒), 也可以是返回下次间隔的函数(如cron策略)
+        self.timeout = timeout  # 单次运行的超时时间(秒), 超时的结果会被丢弃
+        self.retry = retry  # 失败后首次重试的等待(秒), 连续失败时翻倍, 不超过运行间隔; None表示按运行间隔重试
+        self.initial_delay = initial_delay  # 启动后首次运行前的等待(秒), 也可以是返回等待时间的函数
+        self.failures = 0  # 连续失败次数
+        self.next_run = 0
+        self.future = None
+        self.started = 0
+        self.timed_out = False
+
+
+class CollectorScheduler:
+    # 并发调度采集任务, 某个数据源卡住不会拖慢其它数据源
+    # 等待中的任务按下次运行时间放在优先队列里, 每轮只取出到期的任务, 不扫描全部任务
+    def __init__(self, collectors, channel):
+        self.collectors = collectors
+        self.channel = channel
+        # 每个采集任务最多同时运行一次, 因此线程数等于任务数即可保证互不阻塞
+        self.executor = ThreadPoolExecutor(max_workers=max(1, len(collectors)), thread_name_prefix='collector')
+        self.wakeup = threading.Event()
+        self.queue = []  # [(下次运行时间, 序号, 任务)]
+        self.order = itertools.count()  # 运行时间相同时按入队顺序
+        self.running = set()
+        self.lock = threading.Lock()
+
+    def push(self, collector):
+        with self.lock:
+            heapq.heappush(self.queue, (collector.next_run, next(self.order), collector))
+        self.wakeup.set()
+
+    def run(self):
+        now = time.monotonic()
+        for collector in self.collectors:
+            delay = collector.initial_delay() if callable(collector.initial_delay) else collector.initial_delay
+            collector.next_run = now + delay
+            self.push(collector)
+
+        while True:
+            self.wakeup.clear()
+            now = time.monotonic()
+            with self.lock:
+                due = []
+                while self.queue and self.queue[0][0] <= now:
+                    due.append(heapq.heappop(self.queue)[2])
+                running = list(self.running)
+                self.running.update(due)
+                next_due = self.queue[0][0] if self.queue else None
+            for collector in due:
+                self.submit(collector, now)
+
+            deadlines = [collector.started + collector.timeout for collector in due]
+            if next_due is not None:
+                deadlines.append(next_due)
+            for collector in running:
+                if collector.timed_out:
+                    continue
+                if now - collector.started > collector.timeout:
+                    # 超时的任务无法强制终止, 只能等它结束后丢弃结果再重新调度
+                    collector.timed_out = True
+                    if not collector.failures:
+                        print(f"采集任务超时: {collector.name}", file=sys.stderr)
                 else:
-                    return "无法获取天气"
-            else:
-                return "无法获取天气"
-        except Exception:
-            return "天气获取失败"
-
-
-def fetch_data(data_queue):
-    # 初始化数据
-    data = {
-        'hitokoto': Utils.get_hitokoto(),
-        'date': Utils.get_date_strings()[0],
-        'lunar_date': Utils.get_date_strings()[1],
-        'ip': Utils.get_ip_address(IP_INTERFACE),
-        'gold_price': Utils.get_gold_price(),
-        'weather': Utils.get_weather()
-    }
+                    deadlines.append(collector.started + collector.timeout)
 
-    for key, value in data.items():
-        data_queue.put((key, value))
+            # 休眠到下一个任务到期或下一个超时检查, 有任务完成时提前唤醒
+            delay = min(deadlines, default=now + 60) - time.monotonic()
+            self.wakeup.wait(max(0.01, delay))
 
-    timers = {
-        'hitokoto': time.time(),
-        'date': time.time(),
-        'ip': time.time(),
-        'gold_price': time.time(),
-        'weather': time.time()
-    }
+    def submit(self, collector, now):
+        collector.started = now
+        collector.next_run = now + (collector.interval() if callable(collector.interval) else collector.interval)
+        collector.timed_out = False
+        collector.future = self.executor.submit(collector.func)
+        collector.future.add_done_callback(lambda future: self.finish(collector, future))
 
+    def finish(self, collector, future):
+        metrics.record(f"collector.{collector.name}", (time.monotonic() - collector.started) * 1000)
+        try:
+            # 只在连续失败的第一次和恢复时输出日志, 离线时重试不会持续刷屏写满日志
+            failed = collector.timed_out or future.exception() is not None
+            if not failed:
+                if collector.failures:
+                    print(f"采集任务已恢复: {collector.name} (连续失败{collector.failures}次)", file=sys.stderr)
+                collector.failures = 0
+                self.channel.publish(future.result())
+            else:
+                collector.failures += 1
+                if collector.retry:
+                    # 指数退避: 提前到退避时间重试, 但不会晚于正常的下次运行
+                    delay = collector.retry * 2 ** (collector.failures - 1)
+                    collector.next_run = min(collector.next_run, time.monotonic() + delay)
+                if collector.failures == 1 and future.exception() is not None:
+                    print(f"采集任务出错: {collector.name}: {future.exception()}", file=sys.stderr)
+        finally:
+            collector.future = None
+            with self.lock:
+                self.running.discard(collector)
+            self.push(collector)
+
+
+def collect_date():
+    current_date, lunar_date = Utils.get_date_strings()
+    return {'date': current_date, 'lunar_date': lunar_date}
+
+
+def collect_telemetry():
+    # 每个周期一次批量采样, 汇总为显示用的数值: 网速为所选网卡之和, 磁盘使用率和温度取最高值
+    sample = Utils.get_telemetry()
+    interfaces = set(selected_interfaces([name for name, _, _ in sample.nics]))
+    nics = [(upload, download) for name, upload, download in sample.nics if name in interfaces]
+    return {'cpu_usage': sample.cpu, 'memory_usage': sample.memory,
+            'disk_usage': max((percent for _, percent in sample.disks), default=0.0),
+            'upload_speed': sum(upload for upload, _ in nics), 'download_speed': sum(download for _, download in nics),
+            'cpu_temp': max((celsius for _, celsius in sample.temps), default=0.0)}
+
+
+def collect_hitokoto():
+    # 从本地一言池轮换, 不访问网络; 池为空时抛出异常, 等预取完成后退避重试
+    text = offline_store.next_hitokoto()
+    if text is None:
+        raise LookupError('一言池为空, 等待预取')
+    return {'hitokoto': text}
+
+
+def prefetch_hitokoto():
+    # 未展示过的一言不足时批量预取一批, 同一批请求复用同一个长连接; 一条都没取到时抛出异常触发退避
+    if offline_store.unseen_hitokoto() >= HITOKOTO_POOL_LOW:
+        return {}
+    texts = []
+    for _ in range(HITOKOTO_BATCH_SIZE):
+        try:
+            texts.append(Utils.get_hitokoto())
+        except Exception:
+            if not texts:
+                raise
+            break
+    offline_store.add_hitokoto(texts)
+    return {}
+
+
+def cached_collector(name, fetch, interval, timeout):
+    # 带离线存储的采集任务: 成功的结果保存为最近有效值; 失败时抛出异常, 屏幕保留旧值, 按指数退避重试
+    # 保存的值还没过期时, 第一次刷新推迟到过期时再进行
+    def collect():
+        value = fetch()
+        offline_store.put(name, value)
+        return {name: value}
+
+    def initial_delay():
+        age = offline_store.age(name)
+        return 0 if age is None else max(0, interval - age)
+
+    return Collector(name, collect, interval, timeout, retry=RETRY_BACKOFF, initial_delay=initial_delay)
+
+
+def cron(minute=None, hour=None):
+    # 类cron的刷新策略: 返回计算到下一个匹配的本地整分钟还有多少秒的函数, None表示任意值
+    # 多等1秒确保醒来时已跨过该时刻
+    def seconds_until_next():
+        now = datetime.datetime.now()
+        moment = now.replace(second=0, microsecond=0)
+        for _ in range(2 * 24 * 60):
+            moment += datetime.timedelta(minutes=1)
+            if (minute is None or moment.minute == minute) and (hour is None or moment.hour == hour):
+                break
+        return (moment - now).total_seconds() + 1
+    return seconds_until_next
+
+
+class Widget:
+    # 可插拔部件: 依赖的快照字段, 需要的采集任务, 屏幕区域(布局中的位置名), 更新函数(flip_clock, widget, data, dirty_rects)
+    # 只有依赖字段变化时才调用更新函数(every_frame的部件每帧调用); 禁用的部件不创建绘制函数, 它的采集任务也不会运行
+    def __init__(self, name, keys, collectors, update, region=None, every_frame=False):
+        self.name = name
+        self.keys = keys
+        self.collectors = collectors
+        self.update = update
+        self.region = region
+        self.every_frame = every_frame
+
+
+# 采集任务和部件注册表, 部件按注册顺序绘制
+collector_registry = {}
+widget_registry = {}
+
+
+def register_collector(collector):
+    collector_registry[collector.name] = collector
+    return collector
+
+
+def register_widget(widget):
+    widget_registry[widget.name] = widget
+    return widget
+
+
+def enabled_widgets(disabled=()):
+    return [widget for name, widget in widget_registry.items() if name not in disabled]
+
+
+def update_text_widget(flip_clock, widget, data, dirty_rects, font, **options):
+    # 单个文本字段的部件, 锚点取自布局中的区域
+    flip_clock.update_text(data, widget.name, dirty_rects, flip_clock.fonts[font],
+                           flip_clock.layout.positions[widget.region], **options)
+
+
+# 各数据源: (名称, 采集函数, 间隔或策略, 超时)
+register_collector(Collector('hitokoto', collect_hitokoto, 10, 10, retry=1))
+register_collector(Collector('hitokoto_prefetch', prefetch_hitokoto, 60, 60, retry=RETRY_BACKOFF))
+# 日期每分钟检查一次(字符串按天缓存, 只多一次localtime调用), 开机后NTP校时也能在一分钟内更正; 午夜前后按cron策略准时刷新
+register_collector(Collector('date', collect_date, lambda midnight=cron(minute=0, hour=0): min(DATE_POLL_INTERVAL, midnight()), 30))
+register_collector(Collector('ip', lambda: {'ip': Utils.get_ip_address()}, 5, 5))  # 多网卡时每5秒轮换
+register_collector(cached_collector('gold_price', Utils.get_gold_price, 60, 20))
+register_collector(cached_collector('weather', Utils.get_weather, 1800, 20))  # 更新天气信息的时间间隔为30分钟
+register_collector(Collector('telemetry', collect_telemetry, 1, 5))
+
+register_widget(Widget('date', ('date',), ('date',), partial(update_text_widget, font='date'), region='date'))
+register_widget(Widget('lunar_date', ('lunar_date',), ('date',), partial(update_text_widget, font='lunar'), region='lunar_date'))
+register_widget(Widget('hitokoto', ('hitokoto',), ('hitokoto', 'hitokoto_prefetch'),
+                       partial(update_text_widget, font='hitokoto'), region='hitokoto'))
+register_widget(Widget('usage', ('cpu_usage', 'memory_usage', 'disk_usage', 'cpu_temp'), ('telemetry',),
+                       lambda flip_clock, widget, data, dirty_rects: flip_clock.update_usage_circles(data, dirty_rects)))
+register_widget(Widget('network', ('ip', 'upload_speed', 'download_speed'), ('ip', 'telemetry'),
+                       lambda flip_clock, widget, data, dirty_rects: flip_clock.update_network_info(data, dirty_rects),
+                       region='network'))
+register_widget(Widget('gold_price', ('gold_price',), ('gold_price',),
+                       partial(update_text_widget, font='gold', alignment='left'), region='gold_price'))
+register_widget(Widget('weather', ('weather',), ('weather',),
+                       lambda flip_clock, widget, data, dirty_rects: update_text_widget(
+                           flip_clock, widget, data, dirty_rects, 'weather', wrapped=True, max_width=flip_clock.layout.weather_width),
+                       region='weather'))
+register_widget(Widget('history', ('cpu_usage', 'memory_usage', 'disk_usage', 'cpu_temp', 'upload_speed', 'download_speed'),
+                       ('telemetry',),
+                       lambda flip_clock, widget, data, dirty_rects: flip_clock.update_sparklines(widget, data, dirty_rects),
+                       every_frame=True))
+
+
+def fetch_data(channel, widgets=None):
+    # 只运行已启用部件需要的采集任务
+    widgets = enabled_widgets() if widgets is None else widgets
+    keys = {key for widget in widgets for key in widget.keys}
+    collectors = [collector_registry[name] for name in dict.fromkeys(name for widget in widgets for name in widget.collectors)]
+
+    # 先发布本地保存的最近有效值, 重启后立即有内容显示, 过期的值由采集任务在后台刷新
+    channel.publish({key: value for key, value in offline_store.latest_values().items() if key in keys})
+    CollectorScheduler(collectors, channel).run()
+
+
+class FrameExporter:
+    # 导出画面帧: PNG或原始RGB24数据, 目标为文件路径或'-'(标准输出, 可接管道)
+    # PNG路径中含%d格式时按帧序号分别保存, 否则覆盖同一个文件; RAW格式连续写入同一个流
+    def __init__(self, target, fmt='png'):
+        self.target = target
+        self.fmt = fmt
+        self.frame_index = 0
+        self.stream = None
+        if target == '-':
+            self.stream = sys.stdout.buffer
+        elif fmt == 'raw':
+            self.stream = open(target, 'wb')
+
+    def write(self, surface):
+        if self.fmt == 'raw':
+            self.stream.write(pygame.image.tobytes(surface, 'RGB'))
+        elif self.stream is not None:
+            pygame.image.save(surface, self.stream, 'frame.png')
+        elif '%' in self.target:
+            pygame.image.save(surface, self.target % self.frame_index)
+        else:
+            # 先写临时文件再替换, 读取方不会读到半张图
+            pygame.image.save(surface, self.target + '.tmp.png')
+            os.replace(self.target + '.tmp.png', self.target)
+        if self.stream is not None:
+            self.stream.flush()
+        self.frame_index += 1
+
+    def close(self):
+        if self.stream is not None and self.stream is not sys.stdout.buffer:
+            self.stream.close()
+
+
+# 通过网络同步的快照字段, 时间由客户端本地生成
+SNAPSHOT_FIELDS = tuple(field.name for field in fields(DataSnapshot) if field.name not in ('version', 'time'))
+
+
+def encode_snapshot_delta(old, new):
+    # 把两个快照之间变化的字段编码为一行JSON; old为None时编码全部字段
+    changes = {name: getattr(new, name) for name in SNAPSHOT_FIELDS
+               if old is None or getattr(old, name) != getattr(new, name)}
+    return (json.dumps({'version': new.version, 'changes': changes}, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+class SnapshotServer:
+    # 服务端: 本机只采集一次数据, 把状态增量以JSON行的形式推送给所有瘦客户端
+    # 新客户端连接时先收到一份完整状态, 之后只收到变化的字段
+    def __init__(self, address):
+        self.sock = socket.create_server(address)
+        self.clients = []
+        self.snapshot = DataSnapshot()
+        self.lock = threading.Lock()
+
+    def accept_clients(self):
+        # 每个客户端有独立的发送队列和发送线程, 锁内只入队, 某个客户端卡住不会拖慢其他客户端
+        while True:
+            conn, peer = self.sock.accept()
+            conn.settimeout(SERVER_SEND_TIMEOUT)
+            outbox = queue.Queue(SERVER_CLIENT_BACKLOG)
+            with self.lock:
+                # 完整状态与之后的增量在同一把锁下入队, 保证顺序衔接
+                outbox.put(encode_snapshot_delta(None, self.snapshot))
+                self.clients.append(outbox)
+            threading.Thread(target=self.send_to_client, args=(conn, peer, outbox), daemon=True).start()
+            print(f"客户端已连接: {peer[0]}:{peer[1]}", file=sys.stderr)
+
+    def send_to_client(self, conn, peer, outbox):
+        # 在锁外发送, 发送失败或积压过多(收到None)时断开该客户端
+        with conn:
+            while (message := outbox.get()) is not None:
+                try:
+                    conn.sendall(message)
+                except OSError:
+                    break
+        with self.lock:
+            if outbox in self.clients:
+                self.clients.remove(outbox)
+        print(f"客户端已断开: {peer[0]}:{peer[1]}", file=sys.stderr)
+
+    def broadcast(self, channel, wakeup):
+        # 有新快照时把增量放入所有客户端的发送队列, 队列已满的客户端直接断开
+        while True:
+            wakeup.wait()
+            wakeup.clear()
+            snapshot = channel.latest()
+            with self.lock:
+                message = encode_snapshot_delta(self.snapshot, snapshot)
+                self.snapshot = snapshot
+                for outbox in list(self.clients):
+                    try:
+                        outbox.put_nowait(message)
+                    except queue.Full:
+                        # 丢掉增量会让客户端状态错乱, 清空队列后通知发送线程断开
+                        self.clients.remove(outbox)
+                        while not outbox.empty():
+                            outbox.get_nowait()
+                        outbox.put_nowait(None)
+
+    def serve_forever(self, channel, wakeup):
+        threading.Thread(target=self.accept_clients, daemon=True).start()
+        self.broadcast(channel, wakeup)
+
+
+def receive_snapshots(channel, address):
+    # 瘦客户端: 从服务端接收状态增量并发布到本地数据通道, 断线后按指数退避重连
+    delay = 1
     while True:
-        # 更新一言
-        if time.time() - timers['hitokoto'] >= 10:
-            data_queue.put(('hitokoto', Utils.get_hitokoto()))
-            timers['hitokoto'] = time.time()
-
-        # 更新日期和农历日期
-        if time.time() - timers['date'] >= 60:
-            current_date, lunar_date = Utils.get_date_strings()
-            data_queue.put(('date', current_date))
-            data_queue.put(('lunar_date', lunar_date))
-            timers['date'] = time.time()
-
-        # 更新IP地址
-        if time.time() - timers['ip'] >= 5:
-            data_queue.put(('ip', Utils.get_ip_address(IP_INTERFACE)))
-            timers['ip'] = time.time()
-
-        # 更新金价
-        if time.time() - timers['gold_price'] >= 60:
-            data_queue.put(('gold_price', Utils.get_gold_price()))
-            timers['gold_price'] = time.time()
-
-        # 更新天气信息
-        if time.time() - timers['weather'] >= 1800:  # 更新天气信息的时间间隔为30分钟
-            data_queue.put(('weather', Utils.get_weather()))
-            timers['weather'] = time.time()
-
-        # 获取网络速度
-        upload_speed, download_speed = Utils.get_network_speed(IP_INTERFACE)
-        data_queue.put(('upload_speed', upload_speed))
-        data_queue.put(('download_speed', download_speed))
-
-        # 获取系统使用率
-        cpu_usage, memory_usage, disk_usage = Utils.get_system_usage()
-        data_queue.put(('cpu_usage', cpu_usage))
-        data_queue.put(('memory_usage', memory_usage))
-        data_queue.put(('disk_usage', disk_usage))
-
-        # 获取CPU温度
-        data_queue.put(('cpu_temp', Utils.get_cpu_temp()))
-
-        time.sleep(1)
-
-
-def main():
+        try:
+            with socket.create_connection(address, timeout=10) as sock:
+                sock.settimeout(None)
+                delay = 1
+                for line in sock.makefile('r', encoding='utf-8'):
+                    changes = json.loads(line)['changes']
+                    channel.publish({key: value for key, value in changes.items() if key in SNAPSHOT_FIELDS})
+        except (OSError, ValueError, KeyError) as e:
+            print(f"与服务端的连接中断: {e}", file=sys.stderr)
+        time.sleep(delay)
+        delay = min(delay * 2, 60)
+
+
+def start_data_source(args, channel):
+    # 数据来源: 连接服务端时接收远程状态, 否则在本机采集
+    if args.connect:
+        target, source_args = receive_snapshots, (channel, args.connect)
+    else:
+        target, source_args = fetch_data, (channel, enabled_widgets(args.disable))
+    threading.Thread(target=target, args=source_args, daemon=True).start()
+
+
+def run_display(args):
     clock = pygame.time.Clock()
-    flip_clock = FlipClock()
+    flip_clock = FlipClock(size=args.size, widgets=enabled_widgets(args.disable))
+    startup.mark('display ready')
     running = True
 
-    # 创建数据队列和线程
-    data_queue = queue.Queue()
-    data_thread = threading.Thread(target=fetch_data, args=(data_queue,), daemon=True)
-    data_thread.start()
-
-    # 初始化数据
-    data = {
-        'ip': " ",
-        'hitokoto': " ",
-        'upload_speed': 0.0,
-        'download_speed': 0.0,
-        'cpu_temp': 0.0,
-        'cpu_usage': 0.0,
-        'memory_usage': 0.0,
-        'disk_usage': 0.0,
-        'date': " ",
-        'lunar_date': " ",
-        'gold_price': " ",
-        'weather': " "
-    }
+    # 创建数据通道, 采集线程有新数据时投递事件唤醒主循环
+    data_event = pygame.event.custom_type()
+
+    def notify():
+        # 退出后采集线程可能仍在发布数据, 此时视频系统已关闭
+        if pygame.display.get_init():
+            pygame.event.post(pygame.event.Event(data_event))
+
+    channel = SnapshotChannel(notify=notify)
+    pygame.event.set_blocked(pygame.MOUSEMOTION)
 
     while running:
-        # 事件处理
-        for event in pygame.event.get():
+        # 读取最新数据快照并填入当前时间
+        frame_start = time.perf_counter()
+        with metrics.timer('frame'):
+            data = replace(channel.latest(), time=Utils.get_time_strings())
+            dirty_rects = flip_clock.draw_flip_clock(data)
+            flip_clock.present(dirty_rects)
+        # 只计本帧绘制和提交的耗时; clock.get_rawtime()会把两次tick之间的空闲等待也算进去, 每次翻页的第一帧都会误判超时
+        flip_clock.frame_budget_exceeded = (time.perf_counter() - frame_start) * 1000 > 1000 / FLIP_FPS
+
+        if not flip_clock.drawn_frames:
+            # 首帧显示后才启动采集线程, 网络模块的导入不会拖慢首帧
+            startup.mark('first frame')
+            start_data_source(args, channel)
+        flip_clock.drawn_frames += 1
+
+        # 翻页期间按固定帧率绘制; 上一帧耗时超出预算时让动画跳帧
+        if flip_clock.flips:
+            clock.tick(FLIP_FPS)
+        else:
+            clock.tick()
+
+        # 事件处理: 有未加载的资源时每轮空闲加载一项; 否则没有动画时阻塞等待, 直到有事件、新数据到达或下一个整秒
+        if flip_clock.flips:
+            events = pygame.event.get()
+        elif flip_clock.pending_assets:
+            flip_clock.load_next_asset()
+            events = pygame.event.get()
+        else:
+            events = [pygame.event.wait(Utils.ms_until_next_second())] + pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
                 running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                flip_clock.toggle_metrics_overlay()
+            elif event.type == pygame.VIDEORESIZE:
+                flip_clock.resize(event.size)
 
-        # 更新数据队列中的数据
-        while not data_queue.empty():
-            key, value = data_queue.get()
-            data[key] = value
+    pygame.quit()
 
-        # 获取当前时间
-        data['time'] = Utils.get_time_strings()
-        dirty_rects = flip_clock.draw_flip_clock(data)
-        pygame.display.update(dirty_rects)
-        clock.tick(30)
 
-    pygame.quit()
+def run_headless(args):
+    # 无头模式: 绘制到离屏表面并导出帧
+    # 指定--fps时按固定帧率导出, 画面没变化时重复上一帧, 适合编码成视频或推流; 否则只在画面变化时导出, 并关闭翻页动画, 每帧都是完整画面
+    flip_clock = FlipClock(size=args.size, headless=True, widgets=enabled_widgets(args.disable),
+                           animate=None if args.fps else False)
+    exporter = FrameExporter(args.export, args.format) if args.export else None
+
+    wakeup = threading.Event()
+    channel = SnapshotChannel(notify=wakeup.set)
+
+    frames = 0
+    next_frame = time.monotonic()
+    try:
+        while not args.frames or frames < args.frames:
+            data = replace(channel.latest(), time=Utils.get_time_strings())
+            if flip_clock.draw_flip_clock(data) or args.fps:
+                if exporter:
+                    exporter.write(flip_clock.screen)
+                frames += 1
+
+            if not flip_clock.drawn_frames:
+                startup.mark('first frame')
+                start_data_source(args, channel)
+                flip_clock.load_all_assets()
+            flip_clock.drawn_frames += 1
+
+            if args.fps:
+                # 按固定节拍推进, 某帧耗时过长时后面的帧紧接着补上, 导出的帧数始终与经过的时间一致
+                next_frame += 1 / args.fps
+                time.sleep(max(0.0, next_frame - time.monotonic()))
+            elif flip_clock.flips:
+                time.sleep(1 / FLIP_FPS)
+            else:
+                wakeup.wait(Utils.ms_until_next_second() / 1000)
+                wakeup.clear()
+    finally:
+        if exporter:
+            exporter.close()
+
+
+def run_server(args):
+    # 服务端模式: 只采集数据并推送给客户端, 不渲染画面
+    # 先绑定端口, 端口被占用时直接报错退出, 不会留下已启动的采集线程
+    try:
+        server = SnapshotServer(args.serve)
+    except OSError as e:
+        print(f"数据服务启动失败: {e}", file=sys.stderr)
+        sys.exit(1)
+    wakeup = threading.Event()
+    channel = SnapshotChannel(notify=wakeup.set)
+    threading.Thread(target=fetch_data, args=(channel, enabled_widgets(args.disable)), daemon=True).start()
+    print(f"数据服务已启动: {args.serve[0] or '*'}:{args.serve[1]}", file=sys.stderr)
+    server.serve_forever(channel, wakeup)
+
+
+def parse_address(value):
+    # 解析形如 host:port、port 或 host 的地址, 省略端口时使用SERVER_PORT
+    host, _, port = value.rpartition(':')
+    if not host and not port.isdigit():
+        host, port = port, ''
+    try:
+        return host, int(port) if port else SERVER_PORT
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的地址: {value}")
+
+
+def parse_size(value):
+    # 解析形如 1920x1080 的分辨率
+    try:
+        width, height = value.lower().split('x')
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的分辨率: {value}")
+
+
+def parse_widget_names(value):
+    # 解析逗号分隔的部件名称
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in widget_registry]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"未知的部件: {', '.join(unknown)} (可选: {', '.join(widget_registry)})")
+    return names
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Flip Clock')
+    parser.add_argument('--size', type=parse_size, help='窗口分辨率, 如 1920x1080 (默认全屏)')
+    parser.add_argument('--headless', action='store_true', help='无头模式, 绘制到离屏表面')
+    parser.add_argument('--export', metavar='PATH', help='无头模式下导出帧的路径, "-" 表示标准输出')
+    parser.add_argument('--format', choices=['png', 'raw'], default='png', help='导出格式: png 或 raw(RGB24)')
+    parser.add_argument('--fps', type=float, default=0, help='无头模式下按固定帧率导出, 画面不变时重复上一帧 (0 表示只在画面变化时导出)')
+    parser.add_argument('--frames', type=int, default=0, help='无头模式下输出指定帧数后退出 (0 表示不限)')
+    parser.add_argument('--startup-timeline', action='store_true', help='在标准错误输出启动时间线')
+    parser.add_argument('--disable', type=parse_widget_names, default=[], metavar='NAMES',
+                        help=f"禁用的部件, 逗号分隔 (可选: {', '.join(widget_registry)})")
+    parser.add_argument('--metrics-file', metavar='PATH', help=f'每{METRICS_DUMP_INTERVAL}秒把性能指标写入该文件')
+    parser.add_argument('--metrics-format', choices=['json', 'prometheus'], default='json', help='性能指标文件格式')
+    parser.add_argument('--serve', type=parse_address, nargs='?', const=('', SERVER_PORT), metavar='[HOST][:PORT]',
+                        help=f'服务端模式: 采集数据并推送给客户端 (默认端口 {SERVER_PORT})')
+    parser.add_argument('--connect', type=parse_address, metavar='HOST[:PORT]', help=f'客户端模式: 从服务端接收数据, 不在本机采集 (默认端口 {SERVER_PORT})')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.startup_timeline:
+        startup.enable()
+    if args.metrics_file:
+        threading.Thread(target=metrics.dump_forever, args=(args.metrics_file, args.metrics_format), daemon=True).start()
+    if args.serve:
+        run_server(args)
+    elif args.headless:
+        run_headless(args)
+    else:
+        run_display(args)
 
 
 if __name__ == '__main__':
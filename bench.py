@@ -0,0 +1,140 @@
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tracemalloc
+
+import app
+
+# 合成数据用的文本素材
+HITOKOTO_SAMPLES = [
+    "人生如逆旅，我亦是行人。 —— 临江仙·送钱穆父",
+    "The quick brown fox jumps over the lazy dog, again and again and again. —— pangram",
+    "世界上只有一种真正的英雄主义，那就是在认清生活的真相后依然热爱生活。 —— 米开朗基罗传",
+    "Stay hungry, stay foolish. 求知若饥，虚心若愚。 —— Steve Jobs",
+]
+WEATHER_SAMPLES = [
+    "晴 15℃~26℃\n天气晴朗，适合外出，注意防晒补水",
+    "小雨 12℃~18℃\n出门记得带伞，路面湿滑注意安全",
+    "多云 8℃~16℃\nCloudy with a light breeze in the afternoon",
+]
+
+
+def synthetic_stream(frames, seed=0):
+    # 生成合成数据: 逐秒走时, 随机波动的使用率和网速, 定期更换的一言、金价和天气
+    rng = random.Random(seed)
+    data = {'date': '2024-05-20 星期一', 'lunar_date': '农历 2024年4月13日', 'ip': '192.168.1.100'}
+    usage = {'cpu_usage': 20.0, 'memory_usage': 40.0, 'disk_usage': 60.0, 'cpu_temp': 45.0}
+    start = 12 * 3600 + 34 * 60
+    for frame in range(frames):
+        seconds = start + frame
+        data['time'] = f"{seconds // 3600 % 24:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+        for key, value in usage.items():
+            usage[key] = min(100.0, max(0.0, value + rng.uniform(-3, 3)))
+            data[key] = usage[key]
+        data['upload_speed'] = rng.uniform(0, 50)
+        data['download_speed'] = rng.uniform(0, 200)
+        if frame % 10 == 0:
+            data['hitokoto'] = HITOKOTO_SAMPLES[frame // 10 % len(HITOKOTO_SAMPLES)]
+        if frame % 30 == 0:
+            prices = [rng.uniform(450, 650) for _ in range(5)]
+            lines = [f">> 国内金价: {prices[0]:.2f}元/g(+0.{frame % 97:02d}%)"]
+            lines += [f">> 品牌{i}: {price:.0f}元/g" for i, price in enumerate(prices[1:], 1)]
+            data['gold_price'] = '\n'.join(lines)
+        if frame % 60 == 0:
+            data['weather'] = WEATHER_SAMPLES[frame // 60 % len(WEATHER_SAMPLES)]
+        yield app.DataSnapshot(version=frame + 1, **data)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_pass(flip_clock, frames, seed, trace_allocations):
+    # 逐帧驱动各部件, 记录每个部件的耗时、脏区面积和内存分配
+    widgets = flip_clock.frame_widgets + flip_clock.widgets
+    samples = {name: {'us': [], 'pixels': 0, 'alloc_bytes': 0} for name, _ in widgets}
+    for data in synthetic_stream(frames, seed):
+        for name, update in widgets:
+            dirty_rects = []
+            if trace_allocations:
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                update(data, dirty_rects)
+                samples[name]['alloc_bytes'] += tracemalloc.get_traced_memory()[1] - before
+            else:
+                start = time.perf_counter_ns()
+                update(data, dirty_rects)
+                samples[name]['us'].append((time.perf_counter_ns() - start) / 1000)
+            # 部件常同时返回新旧两个大部分重叠的矩形, 按DamageTracker合并后再计面积, 与实际提交的脏区一致
+            samples[name]['pixels'] += sum(rect.width * rect.height for rect in app.DamageTracker.merge(dirty_rects))
+    return samples
+
+
+def run_benchmark(frames, size, seed, flip):
+    flip_clock = app.FlipClock(size=size, headless=True, animate=flip)
+    flip_clock.load_all_assets()
+    timing = run_pass(flip_clock, frames, seed, trace_allocations=False)
+
+    # 内存分配单独跑一遍, 避免tracemalloc的开销计入耗时
+    alloc_clock = app.FlipClock(size=size, headless=True, animate=flip)
+    alloc_clock.load_all_assets()
+    tracemalloc.start()
+    allocations = run_pass(alloc_clock, frames, seed, trace_allocations=True)
+    tracemalloc.stop()
+
+    widgets = {}
+    for name, sample in timing.items():
+        widgets[name] = {
+            'us_per_frame_mean': sum(sample['us']) / frames,
+            'us_p50': percentile(sample['us'], 0.5),
+            'us_p95': percentile(sample['us'], 0.95),
+            'us_max': max(sample['us'], default=0.0),
+            'dirty_pixels_per_frame': sample['pixels'] / frames,
+            'alloc_bytes_per_frame': allocations[name]['alloc_bytes'] / frames
+        }
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': app.pygame.version.ver,
+            'machine': platform.machine(),
+            'size': list(size),
+            'frames': frames,
+            'seed': seed,
+            'flip_animation': flip
+        },
+        'widgets': widgets,
+        'total': {
+            'us_per_frame_mean': sum(w['us_per_frame_mean'] for w in widgets.values()),
+            'dirty_pixels_per_frame': sum(w['dirty_pixels_per_frame'] for w in widgets.values()),
+            'alloc_bytes_per_frame': sum(w['alloc_bytes_per_frame'] for w in widgets.values())
+        },
+        'render_cache': flip_clock.rendered_text_cache.stats()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Flip Clock 渲染基准测试')
+    parser.add_argument('--frames', type=int, default=600, help='合成数据的帧数(每帧代表1秒)')
+    parser.add_argument('--size', type=app.parse_size, default=app.HEADLESS_SIZE, help='离屏表面分辨率, 如 1920x1080')
+    parser.add_argument('--seed', type=int, default=0, help='随机数种子')
+    parser.add_argument('--flip', action='store_true', help='启用翻页动画')
+    parser.add_argument('--output', default='-', help='JSON结果输出路径, "-" 表示标准输出')
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args.frames, args.size, args.seed, args.flip)
+    if args.output == '-':
+        json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()